@@ -1,8 +1,7 @@
 import os
-from pymongo import MongoClient
-import os
+import threading
+import time
 from dotenv import load_dotenv
-import openai
 
 # Load environment variables from .env file
 load_dotenv()
@@ -10,28 +9,254 @@ load_dotenv()
 # Access the MONGO_URI environment variable
 MONGO_URI = os.getenv('MONGO_URI')
 
-# Connect to MongoDB
-client = MongoClient('mongodb://localhost:27017/')
-db = client['Mentei']
-config_collection = db['configuration']
+# The service configuration document lives in MongoDB and is only read on first use
+CONFIG_MONGO_URI = os.getenv('CONFIG_MONGO_URI', 'mongodb://localhost:27017/')
+CONFIG_DB_NAME = os.getenv('CONFIG_DB_NAME', 'Mentei')
+# Seconds before the configuration document is read again
+CONFIG_TTL_SECONDS = float(os.getenv('CONFIG_TTL_SECONDS', '300'))
+CONFIG_TIMEOUT_MS = int(os.getenv('CONFIG_TIMEOUT_MS', '2000'))
+
+# Settings stored in the configuration document, with the environment variable used as fallback
+DB_SETTINGS = {
+    'WHISPER_API_KEY': ('services', 'whisper', 'api_key'),
+    'PERSPECTIVE_API_KEY': ('services', 'perspective_api', 'api_key'),
+    'AWS_ACCESS_KEY': ('services', 'aws_rekognition', 'access_key'),
+    'AWS_SECRET_KEY': ('services', 'aws_rekognition', 'secret_key'),
+    'AWS_REGION': ('services', 'aws_rekognition', 'region'),
+    'BUCKET_NAME': ('services', 'aws_rekognition', 'bucket_name'),
+}
+
+
+def _load_config_document() -> dict:
+    import pymongo
+    # Imported here since mongo_utils reads its pool settings from this module
+    from app.utils.mongo_utils import get_mongo_client
+    # Refreshes reuse the pooled client, only the read itself is bounded by CONFIG_TIMEOUT_MS
+    with pymongo.timeout(CONFIG_TIMEOUT_MS / 1000):
+        return get_mongo_client(CONFIG_MONGO_URI)[CONFIG_DB_NAME]['configuration'].find_one() or {}
+
+
+class ConfigProvider:
+    """
+    Lazily loads the configuration document and caches it for ttl_seconds.
+    When a refresh fails the last good values are kept, and settings fall back to the environment.
+    """
+
+    def __init__(self, loader, ttl_seconds: float):
+        self._loader = loader
+        self.ttl_seconds = ttl_seconds
+        self._config = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> dict:
+        if self._config is None or time.monotonic() - self._loaded_at >= self.ttl_seconds:
+            with self._lock:
+                if self._config is None or time.monotonic() - self._loaded_at >= self.ttl_seconds:
+                    self.refresh()
+        return self._config
+
+    def refresh(self):
+        try:
+            config = self._loader()
+            if not config:
+                raise ValueError("Configuration not found in the database")
+            self._config = config
+        except Exception as e:
+            from app.utils.logger import log_message
+            log_message(f"Error loading configuration, using environment values: {str(e)}", "ERROR")
+            if self._config is None:
+                self._config = {}
+        # Failed loads are retried after the TTL as well, so a down database is not hit on every call
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = 0.0
+
+
+config_provider = ConfigProvider(_load_config_document, CONFIG_TTL_SECONDS)
+
+
+def get_config() -> dict:
+    """
+    Return the cached configuration document, loading it on first use.
+    """
+    return config_provider.get()
+
+
+def get_setting(name: str, default=None):
+    """
+    Return a setting from the configuration document, falling back to the environment (.env included).
+    :param name: Setting name, e.g. PERSPECTIVE_API_KEY.
+    """
+    value = get_config()
+    for key in DB_SETTINGS.get(name, ()):
+        value = value.get(key) if isinstance(value, dict) else None
+    if name in DB_SETTINGS and value not in (None, ''):
+        return value
+    return os.getenv(name, default)
+
+
+def __getattr__(name):
+    # Keep `from app.config.config import PERSPECTIVE_API_KEY` working, resolved on access instead of at import
+    if name == 'config':
+        return get_config()
+    if name in DB_SETTINGS:
+        return get_setting(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Model registry settings
+# Comma separated list of models to load and warm up when a worker starts
+MODEL_PRELOAD = [name.strip() for name in os.getenv('MODEL_PRELOAD', 'whisper,toxicity,sentiment,yolo').split(',') if name.strip()]
+MODEL_WARMUP = os.getenv('MODEL_WARMUP', 'true').lower() == 'true'
+# Upper bound for resident model weights in MB (0 disables eviction)
+MODEL_MEMORY_BUDGET_MB = int(os.getenv('MODEL_MEMORY_BUDGET_MB', '0'))
+WHISPER_MODEL_SIZE = os.getenv('WHISPER_MODEL_SIZE', 'base')
+# Preload in a background thread so the worker accepts requests while models load
+MODEL_PRELOAD_BACKGROUND = os.getenv('MODEL_PRELOAD_BACKGROUND', 'true').lower() == 'true'
+
+# Runtime of the sentiment and toxicity classifiers: transformers (PyTorch) or onnx (ONNX Runtime)
+TEXT_CLASSIFIER_BACKEND = os.getenv('TEXT_CLASSIFIER_BACKEND', 'transformers')
+# Apply dynamic int8 quantization to the exported ONNX models
+ONNX_QUANTIZE = os.getenv('ONNX_QUANTIZE', 'true').lower() == 'true'
+ONNX_MODEL_DIR = os.getenv(
+    'ONNX_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'static', 'onnx'),
+)
+# ONNX Runtime intra-op threads per session (0 lets ONNX Runtime decide)
+ONNX_THREADS = int(os.getenv('ONNX_THREADS', '0'))
+
+# Number of transcript segments per forward pass for the text classifiers
+CLASSIFICATION_BATCH_SIZE = int(os.getenv('CLASSIFICATION_BATCH_SIZE', '32'))
+# Long transcripts are scored in overlapping windows of this many tokens (capped at the model limit)
+CLASSIFICATION_WINDOW_TOKENS = int(os.getenv('CLASSIFICATION_WINDOW_TOKENS', '512'))
+CLASSIFICATION_WINDOW_OVERLAP = int(os.getenv('CLASSIFICATION_WINDOW_OVERLAP', '64'))
+if CLASSIFICATION_WINDOW_OVERLAP >= CLASSIFICATION_WINDOW_TOKENS:
+    raise ValueError("CLASSIFICATION_WINDOW_OVERLAP must be smaller than CLASSIFICATION_WINDOW_TOKENS")
+# Classification results cached by model and normalized text: in-memory LRU backed by SQLite
+CLASSIFICATION_CACHE_ENABLED = os.getenv('CLASSIFICATION_CACHE_ENABLED', 'true').lower() == 'true'
+CLASSIFICATION_CACHE_MEMORY_ENTRIES = int(os.getenv('CLASSIFICATION_CACHE_MEMORY_ENTRIES', '10000'))
+# Entries kept on disk (0 keeps the cache in memory only)
+CLASSIFICATION_CACHE_DISK_ENTRIES = int(os.getenv('CLASSIFICATION_CACHE_DISK_ENTRIES', '500000'))
+CLASSIFICATION_CACHE_PATH = os.getenv(
+    'CLASSIFICATION_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'static', 'cache', 'classification_cache.sqlite3'),
+)
+
+# Upload settings
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(1024 * 1024)))
+# Largest accepted upload in MB (0 disables the limit)
+MAX_UPLOAD_SIZE_MB = int(os.getenv('MAX_UPLOAD_SIZE_MB', '4096'))
+
+# Background job settings for /video-analysis in job mode
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+# Maximum number of queued plus running jobs before new submissions are rejected
+JOB_QUEUE_LIMIT = int(os.getenv('JOB_QUEUE_LIMIT', '16'))
+# Queued and running jobs refresh updated_at this often; queued/processing jobs not refreshed for
+# JOB_STALE_SECONDS are treated as dead (e.g. after a restart) and can be reprocessed
+JOB_HEARTBEAT_SECONDS = float(os.getenv('JOB_HEARTBEAT_SECONDS', '30'))
+JOB_STALE_SECONDS = float(os.getenv('JOB_STALE_SECONDS', '300'))
+
+# Keep an MP3 copy of the extracted audio next to the video (written by the same ffmpeg call)
+ARCHIVE_AUDIO_MP3 = os.getenv('ARCHIVE_AUDIO_MP3', 'true').lower() == 'true'
+
+# Frame sampling for object detection: "fps", "keyframes" or "stride"
+FRAME_SAMPLING_MODE = os.getenv('FRAME_SAMPLING_MODE', 'fps')
+FRAME_SAMPLE_FPS = float(os.getenv('FRAME_SAMPLE_FPS', '2'))
+FRAME_STRIDE = int(os.getenv('FRAME_STRIDE', '5'))
+# Sample intervals (in seconds) at or above this value seek instead of decoding every frame
+FRAME_SEEK_INTERVAL = float(os.getenv('FRAME_SEEK_INTERVAL', '2'))
+
+# Object detection pipeline
+DETECTION_BATCH_SIZE = int(os.getenv('DETECTION_BATCH_SIZE', '8'))
+# Maximum number of decoded frames (and annotated frames) waiting between stages
+DETECTION_QUEUE_DEPTH = int(os.getenv('DETECTION_QUEUE_DEPTH', '32'))
+SAVE_ANNOTATED_FRAMES = os.getenv('SAVE_ANNOTATED_FRAMES', 'true').lower() == 'true'
+
+# Scene-change gating: YOLO only runs when a sampled frame differs from the current scene
+SCENE_GATING = os.getenv('SCENE_GATING', 'true').lower() == 'true'
+# Histogram distance (0-1) above which a frame starts a new scene
+SCENE_CHANGE_THRESHOLD = float(os.getenv('SCENE_CHANGE_THRESHOLD', '0.3'))
+# Re-run detection inside a long scene after this many seconds of reused results
+SCENE_MAX_REUSE_SECONDS = float(os.getenv('SCENE_MAX_REUSE_SECONDS', '10'))
+
+# Chunked transcription: long audio is split at silences and transcribed across processes
+TRANSCRIPTION_WORKERS = int(os.getenv('TRANSCRIPTION_WORKERS', '2'))
+TRANSCRIPTION_CHUNK_SECONDS = float(os.getenv('TRANSCRIPTION_CHUNK_SECONDS', '120'))
+# How far from the target length (in seconds) a chunk boundary may move to land on silence
+TRANSCRIPTION_SPLIT_WINDOW_SECONDS = float(os.getenv('TRANSCRIPTION_SPLIT_WINDOW_SECONDS', '10'))
+
+# Speech-to-text: "whisper", "faster-whisper" or "auto" (faster-whisper when installed).
+# The default is the openai-whisper model preloaded as "whisper"; for faster-whisper, preload
+# faster-whisper-<size> instead (e.g. MODEL_PRELOAD=faster-whisper-base,toxicity,sentiment,yolo)
+STT_BACKEND = os.getenv('STT_BACKEND', 'whisper')
+# Target wall-clock seconds for transcribing one upload; larger models are used while they fit (0 always uses WHISPER_MODEL_SIZE)
+STT_LATENCY_SLO_SECONDS = float(os.getenv('STT_LATENCY_SLO_SECONDS', '300'))
+# Model sizes the policy may choose from, best quality first. By default WHISPER_MODEL_SIZE and
+# the smaller sizes, so typical uploads use the preloaded model and only very long ones step down
+_WHISPER_SIZES = ['large-v3', 'large', 'medium', 'small', 'base', 'tiny']
+_DEFAULT_STT_SIZES = (
+    _WHISPER_SIZES[_WHISPER_SIZES.index(WHISPER_MODEL_SIZE):] if WHISPER_MODEL_SIZE in _WHISPER_SIZES else [WHISPER_MODEL_SIZE]
+)
+STT_MODEL_SIZES = [name.strip() for name in os.getenv('STT_MODEL_SIZES', ','.join(_DEFAULT_STT_SIZES)).split(',') if name.strip()]
+# CTranslate2 compute type of faster-whisper on CPU
+FASTER_WHISPER_COMPUTE_TYPE = os.getenv('FASTER_WHISPER_COMPUTE_TYPE', 'int8')
 
-# Fetch configuration from MongoDB
-config = config_collection.find_one()
+# Voice activity detection ahead of Whisper: "energy" or "webrtc" (needs the webrtcvad package)
+VAD_ENABLED = os.getenv('VAD_ENABLED', 'true').lower() == 'true'
+VAD_BACKEND = os.getenv('VAD_BACKEND', 'energy')
+VAD_AGGRESSIVENESS = int(os.getenv('VAD_AGGRESSIVENESS', '2'))
+# Frames louder than the noise floor by this many dB count as speech in the energy backend;
+# clips whose loud and quiet frames differ by less than this have no pauses, see VAD_MODULATION_DB
+VAD_ENERGY_MARGIN_DB = float(os.getenv('VAD_ENERGY_MARGIN_DB', '12'))
+# Frames quieter than this (dBFS) are always silence in the energy backend
+VAD_ENERGY_FLOOR_DB = float(os.getenv('VAD_ENERGY_FLOOR_DB', '-50'))
+# In clips without pauses, frames whose energy varies by less than this (dB, standard deviation
+# over half a second) are taken for music or tones; rhythmic music can still pass, webrtc is stricter
+VAD_MODULATION_DB = float(os.getenv('VAD_MODULATION_DB', '0.8'))
+VAD_MIN_SPEECH_MS = int(os.getenv('VAD_MIN_SPEECH_MS', '250'))
+VAD_MIN_SILENCE_MS = int(os.getenv('VAD_MIN_SILENCE_MS', '400'))
+VAD_PADDING_MS = int(os.getenv('VAD_PADDING_MS', '200'))
 
-if not config:
-    raise ValueError("Configuration not found in the database")
+# Report formats written for every video: json, csv, parquet and/or excel
+EXPORT_FORMATS = [name.strip() for name in os.getenv('EXPORT_FORMATS', 'json').split(',') if name.strip()]
+# Rows per Parquet row group / CSV chunk in bulk exports
+EXPORT_ROW_GROUP_SIZE = int(os.getenv('EXPORT_ROW_GROUP_SIZE', '5000'))
 
-# Retrieve API keys and configuration data from DB
-WHISPER_API_KEY = config['services']['whisper']['api_key']
-openai.api_key=config['services']['whisper']['api_key']
-models = openai.Model.list()
-print(models)
+# Perspective API client: endpoint, request rate, parallel requests and retries on 429/5xx
+PERSPECTIVE_API_URL = os.getenv('PERSPECTIVE_API_URL', 'https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze')
+PERSPECTIVE_QPS = float(os.getenv('PERSPECTIVE_QPS', '1'))
+PERSPECTIVE_MAX_CONCURRENCY = int(os.getenv('PERSPECTIVE_MAX_CONCURRENCY', '8'))
+PERSPECTIVE_MAX_RETRIES = int(os.getenv('PERSPECTIVE_MAX_RETRIES', '4'))
+PERSPECTIVE_BACKOFF_SECONDS = float(os.getenv('PERSPECTIVE_BACKOFF_SECONDS', '1'))
+PERSPECTIVE_TIMEOUT_SECONDS = float(os.getenv('PERSPECTIVE_TIMEOUT_SECONDS', '10'))
 
-PERSPECTIVE_API_KEY = config['services']['perspective_api']['api_key']
-AWS_ACCESS_KEY = config['services']['aws_rekognition']['access_key']
-AWS_SECRET_KEY = config['services']['aws_rekognition']['secret_key']
-AWS_REGION = config['services']['aws_rekognition']['region']
-BUCKET_NAME = config['services']['aws_rekognition']['bucket_name']
-# OPENAI_API_KEY = config['services']['openai']['api_key']
+# OpenAI harmful-content backend: segments packed per request, parallel requests and cached results
+OPENAI_MODERATION_MODEL = os.getenv('OPENAI_MODERATION_MODEL', 'gpt-3.5-turbo')
+OPENAI_BATCH_SIZE = int(os.getenv('OPENAI_BATCH_SIZE', '20'))
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', '4'))
+OPENAI_CACHE_SIZE = int(os.getenv('OPENAI_CACHE_SIZE', '10000'))
 
+# Logging: file, minimum level, "json" or "text" lines, and a background writer thread
+LOG_FILE = os.getenv(
+    'LOG_FILE', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'utils', 'logs', 'debug.log')
+)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() == 'true'
+# Records buffered for the writer thread; further records are dropped instead of blocking
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+# Share of high-volume messages kept, by category, e.g. "detection=0.01,transcription=0.1"
+LOG_SAMPLING = {
+    name.strip(): float(rate)
+    for name, _, rate in (item.partition('=') for item in os.getenv('LOG_SAMPLING', 'detection=0.01').split(','))
+    if name.strip() and rate
+}
 
+# Shared MongoDB connection pool
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '50'))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', '30000'))
@@ -1,5 +1,14 @@
-from fastapi import FastAPI
+import time
+import uuid
+from fastapi import FastAPI, Request
 from app.routes import login, video_analysis_routes,audio_analysis_routes  # Import the video analysis routes
+from app.routes import job_routes, export_routes, metrics_routes
+from app.services.model_registry import preload_models
+from app.services.job_service import fail_stale_jobs
+from app.services.harmful_content_service_perspective import close_perspective_client
+from app.utils.mongo_utils import close_mongo_clients
+from app.utils.metrics import HTTP_IN_FLIGHT, HTTP_REQUEST_SECONDS
+from app.utils.logger import log_context, stop_logging
 
 app = FastAPI()
 
@@ -7,3 +16,49 @@ app = FastAPI()
 app.include_router(login.router)
 app.include_router(video_analysis_routes.router)
 app.include_router(audio_analysis_routes.router)
+app.include_router(job_routes.router)
+app.include_router(export_routes.router)
+app.include_router(metrics_routes.router)
+
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    # In-flight gauge and latency histogram, labelled by route template rather than raw path
+    HTTP_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    # Every log line written while handling the request carries its ID
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    try:
+        with log_context(request_id=request_id):
+            response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            request.method, getattr(route, "path", "unmatched"), str(status)
+        ).observe(time.perf_counter() - start)
+
+
+@app.on_event("startup")
+def load_models():
+    # Load and warm up the shared models once per worker, in the background by default
+    preload_models()
+
+
+@app.on_event("startup")
+def recover_jobs():
+    # Jobs left queued/processing by a previous process will never finish
+    fail_stale_jobs()
+
+
+@app.on_event("shutdown")
+def close_database():
+    # Release the shared MongoDB and Perspective API connection pools
+    close_mongo_clients()
+    close_perspective_client()
+    # Flush queued log records
+    stop_logging()
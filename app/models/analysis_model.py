@@ -5,6 +5,18 @@ from typing import List, Dict
 class VideoInfo(BaseModel):
     timestamp: float
     detections: List[str]
+    reused: bool = False  # Detections copied from the previous analyzed frame of the same scene
+
+class SceneInfo(BaseModel):
+    scene: int
+    start: float  # Scene start in seconds
+    end: float  # Scene end in seconds
+
+class ObjectDetectionResponse(BaseModel):
+    status: str  # Status of the object detection
+    message: str  # Any relevant message related to the detection result
+    detections: List[VideoInfo] = []  # Detected objects per sampled frame
+    scenes: List[SceneInfo] = []  # Scene boundaries
 
 class VideoAnalysisResponse(BaseModel):
     video_info: dict  # Information about the video
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, HTTPException, File, UploadFile
 from app.services.audio_analysis_service import transcribe_audio
-from app.services.sentiment_analysis_service import analyze_sentiment
-from app.services.harmful_content_service import analyze_harmful_content
+from app.services.sentiment_analysis_service import analyze_sentiment_windowed
+from app.services.harmful_content_service import analyze_harmful_content_windowed
+from app.services.video_analysis_service import save_speech_coverage
+from app.utils.upload_utils import save_upload_file
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 import os
 
 router = APIRouter()
@@ -14,30 +17,35 @@ async def analyze_audio(metadata_id: str, file: UploadFile = File(...)):
         upload_folder = f"./static/uploads/{metadata_id}"
         os.makedirs(upload_folder, exist_ok=True)
         audio_file_path = os.path.join(upload_folder, f"{metadata_id}.mp3")
+        await save_upload_file(file, audio_file_path)
         
-        with open(audio_file_path, "wb") as audio_file:
-            audio_file.write(await file.read())
-        
-        # Transcribe audio to text
-        transcription = transcribe_audio(audio_file_path)
-        if not transcription:
+        # Transcribe audio to text, recording how much of it is speech
+        speech_stats = {}
+        transcription = await run_in_threadpool(transcribe_audio, audio_file_path, speech_stats)
+        await run_in_threadpool(save_speech_coverage, metadata_id, speech_stats)
+        if not transcription and speech_stats.get("speech_seconds", 1):
             raise HTTPException(status_code=500, detail="Audio transcription failed.")
-        
-        # Sentiment analysis
-        sentiment_result = analyze_sentiment(transcription)
-        
-        # Harmful content analysis
-        harmful_content_result = analyze_harmful_content(transcription)
+
+        sentiment_result, harmful_content_result = None, None
+        if transcription:
+            # Sentiment analysis
+            sentiment_result = await run_in_threadpool(analyze_sentiment_windowed, transcription)
+
+            # Harmful content analysis
+            harmful_content_result = await run_in_threadpool(analyze_harmful_content_windowed, transcription)
 
         # Combine results
         response = {
             "metadata_id": metadata_id,
             "transcription": transcription,
             "sentiment_score": sentiment_result,
-            "harmful_content_flags": harmful_content_result
+            "harmful_content_flags": harmful_content_result,
+            "speech_coverage": speech_stats
         }
 
         return JSONResponse(content=response, status_code=200)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,42 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.services.export_service import get_exporter, iter_export_rows
+from app.utils.logger import log_message
+from app.utils.mongo_utils import MongoDB
+
+router = APIRouter()
+
+
+@router.get("/export")
+def bulk_export(
+    format: str = Query("parquet", description="csv, parquet or json"),
+    metadata_ids: Optional[str] = Query(None, description="Comma separated metadata IDs; all videos when omitted"),
+    status: Optional[str] = Query(None, description="Only export videos with this status, e.g. processed"),
+):
+    """
+    Stream metadata, transcript segments and detected issues for many videos as a single file.
+    Rows are read from MongoDB and written out in chunks, so the export is never held in memory.
+    """
+    exporter = get_exporter(format)
+    if format == "excel":
+        raise HTTPException(status_code=400, detail="Excel is not supported for bulk export.")
+
+    query = {}
+    if metadata_ids:
+        query["metadataId"] = {"$in": [metadata_id.strip() for metadata_id in metadata_ids.split(",") if metadata_id.strip()]}
+    if status:
+        query["status"] = status
+
+    try:
+        rows = iter_export_rows(MongoDB(), query)
+    except Exception as e:
+        log_message(f"Error starting bulk export: {str(e)}", "ERROR")
+        raise HTTPException(status_code=500, detail="Failed to start export.")
+
+    log_message(f"Bulk export started: format={format}, query={query}")
+    return StreamingResponse(
+        exporter.stream(rows),
+        media_type=exporter.media_type,
+        headers={"Content-Disposition": f'attachment; filename="video_analysis_export.{exporter.extension}"'},
+    )
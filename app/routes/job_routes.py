@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException
+from app.services.job_service import get_job_status
+from app.utils.logger import log_message
+
+router = APIRouter()
+
+
+@router.get("/jobs/{metadata_id}")
+async def job_status(metadata_id: str):
+    """
+    Report the stage-level status, progress and final results of a video analysis job.
+    """
+    try:
+        status = await get_job_status(metadata_id)
+    except Exception as e:
+        log_message(f"Error reading job status for {metadata_id}: {str(e)}", "ERROR")
+        raise HTTPException(status_code=500, detail="Failed to read job status.")
+
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return status
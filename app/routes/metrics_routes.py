@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+from app.utils.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+def metrics():
+    """
+    Expose stage timings, model and cache counters and queue gauges for Prometheus.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,18 +1,29 @@
 from pydantic import BaseModel
 from fastapi import APIRouter, File, UploadFile, HTTPException, Form
-from app.models.analysis_model import VideoAnalysisResponse
+from app.models.analysis_model import VideoAnalysisResponse, ObjectDetectionResponse
 from app.services.video_analysis_service import video_analysis
-from app.utils.logger import log_message
+from app.utils.logger import log_message, log_context
+from app.utils.metrics import stage_timer
+from app.utils.upload_utils import save_upload_file
+from fastapi.responses import JSONResponse
 import os
 from app.services.video_analysis_service import analyze_segments_with_timestamps, generate_summary_with_timestamps
 from app.services.audio_analysis_service import transcribe_audio_with_timestamps
 
 from app.services.video_analysis_service import generate_summary_with_timestamps
-from app.services.video_analysis_service import video_analysis
-from app.services.audio_analysis_service import transcribe_audio
-from app.services.sentiment_analysis_service import analyze_sentiment
-from app.services.harmful_content_service import analyze_harmful_content
+from app.services.video_analysis_service import video_analysis, generate_metadata_id, create_metadata_folder
+from app.services.video_analysis_service import (
+    find_video_by_hash, reuse_metadata_folder, discard_metadata_folder, cached_video_summary, run_video_pipeline,
+    save_transcript_segments, save_speech_coverage
+)
+from app.services.job_service import (
+    submit_video_job, claim_video_job, register_job, update_job, job_heartbeat, is_job_active, ACTIVE_JOB_STATUSES
+)
+from starlette.concurrency import run_in_threadpool
+from pymongo.errors import DuplicateKeyError
+from app.config.config import FRAME_SAMPLING_MODE, FRAME_SAMPLE_FPS
 
+import datetime
 import time
 from fastapi import HTTPException
 from app.utils.logger import log_message
@@ -30,70 +41,128 @@ from app.utils.logger import log_message
 router = APIRouter()
 
 
-@router.post("/detect-objects", response_model=VideoAnalysisResponse)
-async def detect_objects(file: UploadFile, output_dir: str = Form("./static/uploads")):
+@router.post("/detect-objects", response_model=ObjectDetectionResponse)
+async def detect_objects(file: UploadFile, output_dir: str = Form("./static/uploads"),
+                         sampling_mode: str = Form(FRAME_SAMPLING_MODE), sample_fps: float = Form(FRAME_SAMPLE_FPS)):
     """
     Endpoint to analyze video for object and scene detection.
     """
     try:
         # Save uploaded video
         video_path = os.path.join(output_dir, file.filename)
-        with open(video_path, "wb") as f:
-            f.write(await file.read())
+        await save_upload_file(file, video_path)
 
         # Analyze the video
-        result = detect_objects_and_scenes(video_path, output_dir)
+        result = await run_in_threadpool(
+            detect_objects_and_scenes, video_path, output_dir, sampling_mode=sampling_mode, sample_fps=sample_fps
+        )
         return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+def _job_in_progress_response(document: dict) -> JSONResponse:
+    """
+    Point a duplicate upload at the job already analyzing the same content.
+    """
+    metadata_id = document["metadataId"]
+    status = document["status"] if document.get("status") in ACTIVE_JOB_STATUSES else "processing"
+    return JSONResponse(
+        content={"metadata_id": metadata_id, "status": status, "status_url": f"/jobs/{metadata_id}"},
+        status_code=202
+    )
+
+
 @router.post("/video-analysis")
-async def analyze_video(file: UploadFile = File(...)):
+async def analyze_video(file: UploadFile = File(...), force_reprocess: bool = Form(False), async_mode: bool = Form(False)):
     """
     Endpoint to analyze video, including transcript, sentiment analysis, and harmful content detection.
+    Repeat uploads of the same content return the stored results unless force_reprocess is set.
+    With async_mode the analysis runs in the background and the metadata_id is returned immediately;
+    poll /jobs/{metadata_id} for progress and results.
     """
     try:
-        # Step 1: Save the uploaded video file
-        upload_folder = "./static/uploads"
-        os.makedirs(upload_folder, exist_ok=True)
-        video_file_path = os.path.join(upload_folder, file.filename)
-        
-        with open(video_file_path, "wb") as f:
-            f.write(await file.read())
-
-        # Step 2: Perform video analysis
-        analysis_summary = video_analysis(video_file_path)
-        audio_file_url = analysis_summary["audio_file_url"]
-
-        # Step 3: Perform audio transcription
-        transcript = transcribe_audio(audio_file_url)
-        if not transcript:
-            raise HTTPException(status_code=500, detail="Audio transcription failed.")
-
-        # Step 4: Perform sentiment analysis on the transcript
-        sentiment_result = analyze_sentiment(transcript)
-
-        # Step 5: Perform harmful content analysis on the transcript
-        harmful_content_result = analyze_harmful_content(transcript)
-
-        # Step 6: Prepare final response
-        return JSONResponse(
-            content={
-                "metadata_id": analysis_summary["metadata_id"],
-                "video_info": analysis_summary["video_info"],
-                "audio_file_url": audio_file_url,
-                "status": analysis_summary["status"],
-                "message": analysis_summary["message"],
-                "transcript": transcript,
-                "sentiment_analysis": sentiment_result,
-                "harmful_content_analysis": harmful_content_result,
-                "excel_file_path": f"./static/uploads/{analysis_summary['metadata_id']}/{analysis_summary['metadata_id']}.xlsx"
-            },
-            status_code=200
-        )
+        # Step 1: Stream the uploaded video straight into its metadata folder
+        metadata_id = generate_metadata_id()
+        metadata_folder = create_metadata_folder(metadata_id)
+        video_file_path = os.path.join(metadata_folder, f"{metadata_id}.mp4")
+        upload = await save_upload_file(file, video_file_path)
+
+        # Return the cached results when this exact file was already analyzed
+        existing_video = await run_in_threadpool(find_video_by_hash, upload["sha256"])
+        if existing_video:
+            existing_id = existing_video["metadataId"]
+            if existing_video.get("results") and not force_reprocess:
+                discard_metadata_folder(metadata_id)
+                log_message(f"Duplicate upload, returning cached results for {existing_id}")
+                return JSONResponse(
+                    content={
+                        "metadata_id": existing_id,
+                        "video_info": existing_video.get("video_info", {}),
+                        "audio_file_url": existing_video.get("audio_file_url", ""),
+                        "status": "success",
+                        "message": "Video already analyzed, returning cached results",
+                        **existing_video["results"],
+                        "report_files": existing_video.get("report_files", {}),
+                        "excel_file_path": existing_video.get("report_files", {}).get("excel"),
+                        "cached": True
+                    },
+                    status_code=200
+                )
+            # Claim the video before touching its folder, so a running job keeps reading its file
+            if not await run_in_threadpool(claim_video_job, existing_id, "queued" if async_mode else "processing"):
+                # The same file is already being analyzed
+                discard_metadata_folder(metadata_id)
+                log_message(f"Duplicate upload, {existing_id} is already being analyzed")
+                return _job_in_progress_response(existing_video)
+            # Reprocess under the existing metadata ID so the hash stays unique
+            video_file_path = reuse_metadata_folder(video_file_path, metadata_id, existing_id)
+            metadata_id = existing_id
+
+        try:
+            # Job mode: hand the pipeline to the background workers
+            if async_mode:
+                job = await run_in_threadpool(submit_video_job, video_file_path, metadata_id, upload["sha256"])
+                return JSONResponse(content=job, status_code=202)
+
+            # Step 2: Run extraction, transcription and analysis, tracked like a job so that
+            # concurrent uploads of the same file wait for this one
+            await run_in_threadpool(register_job, video_file_path, metadata_id, upload["sha256"], status="processing")
+        except DuplicateKeyError:
+            # A concurrent first upload of the same content registered its job first
+            discard_metadata_folder(metadata_id)
+            existing_video = await run_in_threadpool(find_video_by_hash, upload["sha256"])
+            if not existing_video:
+                raise HTTPException(status_code=409, detail="The same video is being uploaded. Try again later.")
+            log_message(f"Duplicate upload, {existing_video['metadataId']} is already being analyzed")
+            return _job_in_progress_response(existing_video)
+        except HTTPException:
+            if not existing_video:
+                # Nothing refers to the new upload yet
+                discard_metadata_folder(metadata_id)
+            raise
 
+        try:
+            with log_context(metadata_id=metadata_id), job_heartbeat(metadata_id):
+                analysis_result = await run_in_threadpool(run_video_pipeline, video_file_path, metadata_id, upload["sha256"])
+        except Exception as e:
+            await run_in_threadpool(
+                update_job,
+                metadata_id,
+                status="failed",
+                error=e.detail if isinstance(e, HTTPException) else str(e),
+                processedTimestamp=datetime.datetime.now().isoformat(),
+            )
+            raise
+
+        # Step 3: Prepare final response
+        return JSONResponse(content={**analysis_result, "cached": False}, status_code=200)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -108,33 +177,41 @@ async def generate_summary(metadata_id: str, audio: UploadFile = File(...)):
         upload_folder = f"./static/uploads/{metadata_id}"
         os.makedirs(upload_folder, exist_ok=True)
         audio_file_path = os.path.join(upload_folder, audio.filename)
-        with open(audio_file_path, "wb") as audio_file:
-            audio_file.write(await audio.read())
+        await save_upload_file(audio, audio_file_path)
 
-        # Step 1: Transcribe audio with timestamps
-        transcript_segments = transcribe_audio_with_timestamps(audio_file_path)
+        # Step 1: Transcribe audio with timestamps, recording how much of it is speech
+        speech_stats = {}
+        with stage_timer("transcription"):
+            transcript_segments = await run_in_threadpool(transcribe_audio_with_timestamps, audio_file_path, speech_stats)
         if "error" in transcript_segments:
             raise HTTPException(status_code=500, detail="Failed to transcribe audio.")
+        await run_in_threadpool(save_speech_coverage, metadata_id, speech_stats)
 
         # Step 2: Analyze transcript segments for problems
-        detected_issues = analyze_segments_with_timestamps(transcript_segments)
+        with stage_timer("segment_analysis"):
+            detected_issues = await run_in_threadpool(analyze_segments_with_timestamps, transcript_segments)
 
-        # Step 3: Generate summary file
+        # Step 3: Generate summary file and store the per-segment results
         summary_file_path = generate_summary_with_timestamps(metadata_id, detected_issues, upload_folder)
+        with stage_timer("mongo_save_segments"):
+            await run_in_threadpool(save_transcript_segments, metadata_id, transcript_segments, detected_issues)
 
         # Return response
         return {
             "metadata_id": metadata_id,
             "summary_file": summary_file_path,
-            "issues_detected": detected_issues
+            "issues_detected": detected_issues,
+            "speech_coverage": speech_stats
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # POST route for video analysis
 @router.post("/analyze-video", response_model=VideoAnalysisResponse)
-async def analyze_video_endpoint(video: UploadFile = File(...)):
+async def analyze_video_endpoint(video: UploadFile = File(...), force_reprocess: bool = Form(False)):
     try:
         # Validate the file extension
         valid_video_extensions = [".mp4", ".avi", ".mov"]
@@ -149,16 +226,30 @@ async def analyze_video_endpoint(video: UploadFile = File(...)):
                 status_code=400, detail="File name contains spaces. Use a valid name."
             )
 
-        # Save the file temporarily
-        os.makedirs("static/uploads/video_files", exist_ok=True)
-        video_file_path = f"static/uploads/video_files/{video.filename.replace(' ', '_')}"
-        with open(video_file_path, "wb") as f:
-            f.write(await video.read())
+        # Stream the file straight into its metadata folder
+        metadata_id = generate_metadata_id()
+        metadata_folder = create_metadata_folder(metadata_id)
+        video_file_path = os.path.join(metadata_folder, f"{metadata_id}.mp4")
+        upload = await save_upload_file(video, video_file_path)
 
         log_message(f"File uploaded: {video.filename}")
 
+        # Skip extraction entirely for content that was already analyzed
+        existing_video = await run_in_threadpool(find_video_by_hash, upload["sha256"])
+        if existing_video:
+            if not force_reprocess:
+                discard_metadata_folder(metadata_id)
+                return cached_video_summary(existing_video)
+            if is_job_active(existing_video):
+                # Never replace the file a running job is reading
+                discard_metadata_folder(metadata_id)
+                raise HTTPException(status_code=409, detail="This video is being analyzed. Try again when it finishes.")
+            video_file_path = reuse_metadata_folder(video_file_path, metadata_id, existing_video["metadataId"])
+            metadata_id = existing_video["metadataId"]
+
         # Perform video analysis
-        analysis_summary = video_analysis(video_file_path)
+        with log_context(metadata_id=metadata_id):
+            analysis_summary = await run_in_threadpool(video_analysis, video_file_path, metadata_id, upload["sha256"])
 
         # Clean up the uploaded file with retry logic
         # for _ in range(5):  # Retry up to 5 times
@@ -175,6 +266,8 @@ async def analyze_video_endpoint(video: UploadFile = File(...)):
 
         return analysis_summary
 
+    except HTTPException:
+        raise
     except Exception as e:
         log_message(f"Error during video analysis: {str(e)}", "ERROR")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
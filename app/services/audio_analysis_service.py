@@ -1,143 +1,104 @@
-import whisper
-from pydub import AudioSegment
-import os
 import warnings
-from tqdm import tqdm
 
 # Suppress specific warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 warnings.filterwarnings("ignore", category=UserWarning, message="FP16 is not supported on CPU")
-# app/services/audio_analysis_service.py
 
-from pydub import AudioSegment
-import os
-import whisper
+from app.utils.audio_utils import load_audio_input, SAMPLE_RATE
+from app.services.chunked_transcription import transcribe_chunked, should_chunk
+from app.services.stt_backends import choose_stt, get_stt_backend
+from app.services.vad_service import detect_speech_regions, compact_speech, remap_segments, speech_coverage
+from app.config.config import VAD_ENABLED, TRANSCRIPTION_WORKERS
 
-def transcribe_audio(audio_path: str) -> str:
+
+def keep_speech_only(audio, speech_stats: dict = None):
+    """
+    Run voice activity detection and drop silence and non-speech stretches before Whisper.
+    :param audio: Mono 16 kHz float32 samples.
+    :param speech_stats: Optional dictionary filled with speech coverage statistics.
+    :return: Tuple of the speech-only samples and the mapping back to the original timeline
+             (None when VAD is disabled).
+    """
+    if not VAD_ENABLED:
+        return audio, None
+    regions = detect_speech_regions(audio)
+    if speech_stats is not None:
+        speech_stats.update(speech_coverage(regions, len(audio)))
+    speech, mapping = compact_speech(audio, regions)
+    return speech, mapping
+
+
+def run_speech_to_text(audio, speech_stats: dict = None, word_timestamps: bool = False) -> dict:
     """
-    Transcribes an audio file (MP3) to text using the Whisper model from OpenAI,
-    running locally without the need for an API key.
-    :param audio_path: Path to the MP3 file.
-    :return: The transcribed text from the audio file.
+    Transcribe speech samples with the backend and model size chosen for their length.
+    Long audio is split at silences and transcribed in parallel.
+    :param audio: Mono 16 kHz float32 samples.
+    :param speech_stats: Optional dictionary receiving the chosen backend and model.
+    :param word_timestamps: Align segment timestamps on words.
+    :return: Dictionary with the full "text" and its "segments" on the timeline of the samples.
+    """
+    chunked = should_chunk(audio)
+    backend, model_size = choose_stt(len(audio) / SAMPLE_RATE, workers=TRANSCRIPTION_WORKERS if chunked else 1)
+    if speech_stats is not None:
+        speech_stats.update({"stt_backend": backend, "stt_model": model_size})
+
+    if chunked:
+        segments = transcribe_chunked(audio, backend=backend, model_size=model_size, word_timestamps=word_timestamps)
+        return {"text": "".join(segment["text"] for segment in segments), "segments": segments}
+    return get_stt_backend(backend).transcribe(audio, model_size, word_timestamps=word_timestamps)
+
+
+def transcribe_audio(audio_path, speech_stats: dict = None) -> str:
+    """
+    Transcribes audio to text with a locally running Whisper model (openai-whisper or faster-whisper),
+    without the need for an API key. Only speech regions are transcribed.
+    :param audio_path: Path to an audio/video file, or 16 kHz mono float32 samples.
+    :param speech_stats: Optional dictionary filled with speech coverage statistics.
+    :return: The transcribed text from the audio file, empty when it holds no speech.
+    :raises RuntimeError: If the audio cannot be decoded or transcribed.
     """
     try:
-        # Convert MP3 to WAV using pydub
-        audio = AudioSegment.from_mp3(audio_path)
-        wav_path = audio_path.replace(".mp3", ".wav")
-        audio.export(wav_path, format="wav")
+        # Decode straight to in-memory PCM, no intermediate WAV file
+        audio = load_audio_input(audio_path)
 
-        # Load the Whisper model
-        model = whisper.load_model("base")
+        # Skip silence and music-only stretches
+        audio, _ = keep_speech_only(audio, speech_stats)
+        if not len(audio):
+            return ""
 
-        # Transcribe the audio file
-        result = model.transcribe(wav_path)
+        # Transcribe the samples with the speech-to-text backend suited to their length
+        result = run_speech_to_text(audio, speech_stats)
 
-        # Clean up the temporary WAV file
-        os.remove(wav_path)
+        if "text" not in result:
+            raise ValueError("No text returned from transcription.")
+        return result["text"]
 
-        return result.get("text", "Error: No text returned from transcription.")
-    
     except Exception as e:
         print(f"Error during audio transcription: {e}")
-        return f"Error: {e}"
+        raise RuntimeError(f"Audio transcription failed: {e}") from e
 
 
-def transcribe_audio_with_timestamps(audio_path: str) -> list:
+def transcribe_audio_with_timestamps(audio_path, speech_stats: dict = None) -> list:
     """
-    Transcribes an audio file and returns text segments with timestamps.
-    :param audio_path: Path to the MP3 file.
+    Transcribes audio and returns text segments with timestamps.
+    Only speech regions are transcribed; timestamps refer to the original audio.
+    :param audio_path: Path to an audio/video file, or 16 kHz mono float32 samples.
+    :param speech_stats: Optional dictionary filled with speech coverage statistics.
     :return: List of segments with text and timestamps.
     """
     try:
-        # Convert audio to WAV
-        audio = AudioSegment.from_mp3(audio_path)
-        wav_path = audio_path.replace(".mp3", ".wav")
-        audio.export(wav_path, format="wav")
+        # Decode straight to in-memory PCM, no intermediate WAV file
+        audio = load_audio_input(audio_path)
 
-        # Load Whisper model and transcribe
-        model = whisper.load_model("base")
-        result = model.transcribe(wav_path, word_timestamps=True)
+        # Skip silence and music-only stretches
+        audio, mapping = keep_speech_only(audio, speech_stats)
+        if not len(audio):
+            return []
 
-        # Clean up the temporary WAV file
-        os.remove(wav_path)
+        # Transcribe with the speech-to-text backend suited to the audio length
+        segments = run_speech_to_text(audio, speech_stats, word_timestamps=True)["segments"]
 
         # Return segments with timestamps
-        segments = []
-        for segment in result['segments']:
-            segments.append({
-                "start": segment['start'],  # Start time in seconds
-                "end": segment['end'],      # End time in seconds
-                "text": segment['text']     # Text content
-            })
-        return segments
+        return remap_segments(segments, mapping) if mapping is not None else segments
     except Exception as e:
         return {"error": str(e)}
-
-# def transcribe_audio_with_progress(audio_path: str) -> str:
-#     """
-#     Transcribes an audio file (MP3) to text using the Whisper model from OpenAI,
-#     running locally without the need for an API key. Adds a progress tracker for large files.
-#     Converts MP3 to WAV format before sending to the model.
-#     :param audio_path: Path to the MP3 file.
-#     :return: The transcribed text from the audio file.
-#     """
-#     try:
-#         # Convert MP3 to WAV using pydub
-#         audio = AudioSegment.from_mp3(audio_path)
-#         wav_path = audio_path.replace(".mp3", ".wav")
-#         audio.export(wav_path, format="wav")
-
-#         # Load the Whisper model
-#         model = whisper.load_model("base")  # You can use "small", "medium", or "large" for higher accuracy
-
-#         # Split the audio into smaller chunks (e.g., 30-second chunks) to process with progress
-#         chunk_duration_ms = 30000  # 30 seconds
-#         total_duration_ms = len(audio)
-#         num_chunks = total_duration_ms // chunk_duration_ms + (1 if total_duration_ms % chunk_duration_ms > 0 else 0)
-
-#         # Create a progress bar using tqdm
-#         progress_bar = tqdm(total=num_chunks, desc="Transcribing Audio", unit="chunk")
-
-#         transcribed_text = ""
-        
-#         for i in range(num_chunks):
-#             start_ms = i * chunk_duration_ms
-#             end_ms = min((i + 1) * chunk_duration_ms, total_duration_ms)
-#             chunk = audio[start_ms:end_ms]
-
-#             # Save the chunk as a temporary WAV file
-#             chunk_wav_path = f"{wav_path}_chunk_{i}.wav"
-#             chunk.export(chunk_wav_path, format="wav")
-
-#             # Transcribe the chunk
-#             result = model.transcribe(chunk_wav_path)
-#             transcribed_text += result.get("text", "") + " "
-
-#             # Remove the temporary chunk file
-#             os.remove(chunk_wav_path)
-
-#             # Update the progress bar
-#             progress_bar.update(1)
-
-#         # Close the progress bar
-#         progress_bar.close()
-
-#         # Clean up the original WAV file
-#         os.remove(wav_path)
-
-#         # Return the transcribed text
-#         if transcribed_text:
-#             return transcribed_text.strip()
-#         else:
-#             return "Error: No text returned from transcription."
-
-#     except Exception as e:
-#         print(f"Error during audio transcription: {e}")
-#         return f"Error: {e}"
-
-
-
-# Example usage
-# audio_file_path = "C:/Users/Madhav Sekhri/Downloads/oh-my-love-247222.mp3"
-# transcription = transcribe_audio_with_progress(audio_file_path)
-# print(transcription)
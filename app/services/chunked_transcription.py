@@ -0,0 +1,127 @@
+# app/services/chunked_transcription.py
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.config.config import TRANSCRIPTION_WORKERS, TRANSCRIPTION_CHUNK_SECONDS, TRANSCRIPTION_SPLIT_WINDOW_SECONDS
+from app.config.config import WHISPER_MODEL_SIZE
+from app.utils.audio_utils import SAMPLE_RATE
+from app.utils.logger import log_message
+
+# Energy is measured over 30 ms frames when looking for silence
+_ENERGY_FRAME_SECONDS = 0.03
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def find_split_points(samples: np.ndarray, chunk_seconds: float = TRANSCRIPTION_CHUNK_SECONDS,
+                      window_seconds: float = TRANSCRIPTION_SPLIT_WINDOW_SECONDS,
+                      sample_rate: int = SAMPLE_RATE) -> list:
+    """
+    Choose chunk boundaries close to multiples of chunk_seconds, moved to the quietest
+    point within window_seconds so that words are not cut in half.
+    :param samples: Mono float32 samples.
+    :return: Boundaries as sample offsets, starting with 0 and ending with len(samples).
+    """
+    total = len(samples)
+    chunk = int(chunk_seconds * sample_rate)
+    window = int(window_seconds * sample_rate)
+    frame = max(1, int(_ENERGY_FRAME_SECONDS * sample_rate))
+
+    points = [0]
+    target = chunk
+    while target < total - chunk // 4:
+        lo = max(points[-1] + frame, target - window)
+        hi = min(total, target + window)
+        region = samples[lo:hi]
+        frames = len(region) // frame
+        if frames:
+            energy = np.square(region[:frames * frame].reshape(frames, frame)).mean(axis=1)
+            split = lo + int(np.argmin(energy)) * frame + frame // 2
+        else:
+            split = target
+        points.append(split)
+        target = split + chunk
+    points.append(total)
+    return points
+
+
+def _init_worker(threads: int):
+    # Share the CPU between workers instead of every process using all cores
+    from app.services.stt_backends import STT_BACKENDS
+    for backend in STT_BACKENDS.values():
+        backend.set_threads(threads)
+
+
+def _transcribe_chunk(samples: np.ndarray, offset_seconds: float, backend: str, model_size: str,
+                      word_timestamps: bool = False) -> list:
+    from app.services.stt_backends import get_stt_backend
+    result = get_stt_backend(backend).transcribe(samples, model_size, word_timestamps=word_timestamps)
+    return [
+        {
+            "start": segment['start'] + offset_seconds,  # Start time in seconds on the full audio
+            "end": segment['end'] + offset_seconds,      # End time in seconds on the full audio
+            "text": segment['text']                      # Text content
+        }
+        for segment in result['segments']
+    ]
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            # Spawned workers avoid inheriting torch thread pools from the server process
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(threads,),
+            )
+            log_message(f"Transcription pool started with {workers} workers")
+        return _pool
+
+
+def transcribe_chunked(samples: np.ndarray, workers: int = TRANSCRIPTION_WORKERS,
+                       chunk_seconds: float = TRANSCRIPTION_CHUNK_SECONDS,
+                       backend: str = "whisper", model_size: str = WHISPER_MODEL_SIZE,
+                       word_timestamps: bool = False) -> list:
+    """
+    Transcribe long audio by splitting it at silences and transcribing the chunks in parallel.
+    :param samples: Mono 16 kHz float32 samples.
+    :param workers: Number of transcription processes.
+    :param chunk_seconds: Target chunk length in seconds.
+    :param backend: Speech-to-text backend name (see stt_backends).
+    :param model_size: Model size used by every chunk.
+    :param word_timestamps: Align segment timestamps on words; only needed when segments are used.
+    :return: Segments with globally correct start/end times, as returned by transcribe_audio_with_timestamps.
+    """
+    points = find_split_points(samples, chunk_seconds)
+    chunks = [(samples[start:end], start / SAMPLE_RATE) for start, end in zip(points, points[1:])]
+    log_message(f"Transcribing {len(samples) / SAMPLE_RATE:.1f}s of audio in {len(chunks)} chunks")
+
+    if workers <= 1 or len(chunks) == 1:
+        chunk_segments = [
+            _transcribe_chunk(chunk, offset, backend, model_size, word_timestamps) for chunk, offset in chunks
+        ]
+    else:
+        pool = _get_pool(workers)
+        futures = [
+            pool.submit(_transcribe_chunk, chunk, offset, backend, model_size, word_timestamps) for chunk, offset in chunks
+        ]
+        chunk_segments = [future.result() for future in futures]
+
+    return [segment for segments in chunk_segments for segment in segments]
+
+
+def should_chunk(samples: np.ndarray, workers: int = TRANSCRIPTION_WORKERS,
+                 chunk_seconds: float = TRANSCRIPTION_CHUNK_SECONDS) -> bool:
+    """
+    Chunking only pays off with several workers and audio spanning at least two chunks.
+    """
+    return workers > 1 and len(samples) >= 2 * chunk_seconds * SAMPLE_RATE
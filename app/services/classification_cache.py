@@ -0,0 +1,204 @@
+# app/services/classification_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.config.config import (
+    CLASSIFICATION_CACHE_ENABLED, CLASSIFICATION_CACHE_MEMORY_ENTRIES,
+    CLASSIFICATION_CACHE_DISK_ENTRIES, CLASSIFICATION_CACHE_PATH,
+)
+from app.utils.logger import log_message
+from app.utils.metrics import CACHE_LOOKUPS
+from app.utils.text_utils import text_hash
+
+
+class ClassificationCache:
+    """
+    Two-tier cache of text-classification results keyed by model ID and normalized text.
+    Lookups go to an in-memory LRU first and then to a SQLite store shared by all workers;
+    both tiers are bounded and drop their least recently used entries first.
+    """
+
+    def __init__(self, path: str = CLASSIFICATION_CACHE_PATH, memory_entries: int = CLASSIFICATION_CACHE_MEMORY_ENTRIES,
+                 disk_entries: int = CLASSIFICATION_CACHE_DISK_ENTRIES):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_count = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "memory_evictions": 0, "disk_evictions": 0}
+
+    @staticmethod
+    def key(model_id: str, text: str) -> str:
+        return f"{model_id}:{text_hash(text)}"
+
+    def _connection(self):
+        # Opened on first use; a broken store only disables the disk tier
+        if self._db is None and self.disk_entries > 0:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed REAL NOT NULL)")
+                db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+                self._disk_count = db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+                self._db = db
+            except sqlite3.Error as e:
+                log_message(f"Classification cache store unavailable, using memory only: {str(e)}", "ERROR")
+                self.disk_entries = 0
+        return self._db
+
+    def _remember(self, key: str, result: dict):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["memory_evictions"] += 1
+
+    def get_many(self, model_id: str, texts: list) -> list:
+        """
+        Look up cached results.
+        :return: One result per text, None for misses.
+        """
+        keys = [self.key(model_id, text) for text in texts]
+        results = [None] * len(texts)
+        with self._lock:
+            missing = {}
+            for i, key in enumerate(keys):
+                result = self._memory.get(key)
+                if result is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = result
+                    self._stats["memory_hits"] += 1
+                    CACHE_LOOKUPS.labels("memory_hit").inc()
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            db = self._connection() if missing else None
+            if db is not None:
+                try:
+                    found = {}
+                    keys_missing = list(missing)
+                    # Stay below SQLite's limit on bound parameters
+                    for start in range(0, len(keys_missing), 500):
+                        chunk = keys_missing[start:start + 500]
+                        rows = db.execute(
+                            f"SELECT key, value FROM results WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                        ).fetchall()
+                        found.update((key, json.loads(value)) for key, value in rows)
+                    if found:
+                        now = time.time()
+                        db.executemany("UPDATE results SET accessed = ? WHERE key = ?", [(now, key) for key in found])
+                        db.commit()
+                    for key, result in found.items():
+                        self._remember(key, result)
+                        for i in missing.pop(key):
+                            results[i] = result
+                            self._stats["disk_hits"] += 1
+                            CACHE_LOOKUPS.labels("disk_hit").inc()
+                except sqlite3.Error as e:
+                    log_message(f"Error reading the classification cache: {str(e)}", "ERROR")
+
+            misses = sum(len(indices) for indices in missing.values())
+            self._stats["misses"] += misses
+            CACHE_LOOKUPS.labels("miss").inc(misses)
+        return results
+
+    def put_many(self, model_id: str, texts: list, results: list):
+        """
+        Store results; error results are skipped so they get recomputed next time.
+        """
+        entries = {
+            self.key(model_id, text): result
+            for text, result in zip(texts, results)
+            if isinstance(result, dict) and "error" not in result
+        }
+        if not entries:
+            return
+        with self._lock:
+            for key, result in entries.items():
+                self._remember(key, result)
+            self._stats["writes"] += len(entries)
+
+            db = self._connection()
+            if db is None:
+                return
+            try:
+                now = time.time()
+                db.executemany(
+                    "INSERT OR REPLACE INTO results (key, value, accessed) VALUES (?, ?, ?)",
+                    [(key, json.dumps(result), now) for key, result in entries.items()],
+                )
+                self._disk_count += len(entries)
+                if self._disk_count > self.disk_entries:
+                    self._disk_count = db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+                    # Trim a tenth below the limit so eviction does not run on every write
+                    excess = self._disk_count - int(self.disk_entries * 0.9)
+                    if excess > 0:
+                        db.execute(
+                            "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)", (excess,)
+                        )
+                        self._disk_count -= excess
+                        self._stats["disk_evictions"] += excess
+                db.commit()
+            except sqlite3.Error as e:
+                log_message(f"Error writing the classification cache: {str(e)}", "ERROR")
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters and current sizes of both tiers.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_ratio"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = self._disk_count or 0
+            return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM results")
+                db.commit()
+                self._disk_count = 0
+
+
+classification_cache = ClassificationCache()
+
+
+def cached_classify(model_id: str, texts: list, classify_batch, cache: ClassificationCache = None) -> list:
+    """
+    Classify texts through the cache: only misses reach classify_batch, each distinct text once.
+    :param model_id: Identifier of the model producing the results.
+    :param texts: Texts to classify.
+    :param classify_batch: Callable mapping a list of texts to one result per text.
+    :param cache: Cache to use; defaults to the shared classification_cache.
+    :return: One result per text, in the original order.
+    """
+    if not CLASSIFICATION_CACHE_ENABLED and cache is None:
+        return classify_batch(texts)
+    cache = cache or classification_cache
+
+    results = cache.get_many(model_id, texts)
+    pending = {}
+    for i, result in enumerate(results):
+        if result is None:
+            pending.setdefault(ClassificationCache.key(model_id, texts[i]), []).append(i)
+    if not pending:
+        return results
+
+    pending_texts = [texts[indices[0]] for indices in pending.values()]
+    computed = classify_batch(pending_texts)
+    cache.put_many(model_id, pending_texts, computed)
+    for indices, result in zip(pending.values(), computed):
+        for i in indices:
+            results[i] = result
+    return results
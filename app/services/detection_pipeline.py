@@ -0,0 +1,163 @@
+# app/services/detection_pipeline.py
+import queue
+import threading
+
+import cv2
+
+from app.config.config import DETECTION_BATCH_SIZE, DETECTION_QUEUE_DEPTH, SCENE_MAX_REUSE_SECONDS
+from app.utils.logger import log_message
+
+# Marks the end of a stage's output
+_END = object()
+
+
+class _Stage(threading.Thread):
+    """
+    Background stage that records its error instead of dying silently.
+    """
+
+    def __init__(self, target, name):
+        super().__init__(name=name, daemon=True)
+        self._target_fn = target
+        self.error = None
+
+    def run(self):
+        try:
+            self._target_fn()
+        except Exception as e:
+            self.error = e
+
+
+def _put(q: queue.Queue, item, stop: threading.Event, consumer: threading.Thread = None):
+    # Bounded put that gives up when the pipeline is torn down or its consumer died
+    while not stop.is_set() and (consumer is None or consumer.is_alive()):
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def annotate_frame(frame, boxes: list, labels: list):
+    """
+    Draw detection boxes and labels on a frame in place.
+    """
+    for (x1, y1, x2, y2), label in zip(boxes, labels):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    return frame
+
+
+def run_detection_pipeline(frames, model, output_dir: str = None, batch_size: int = DETECTION_BATCH_SIZE,
+                           queue_depth: int = DETECTION_QUEUE_DEPTH, conf: float = 0.5, scene_detector=None,
+                           max_reuse_seconds: float = SCENE_MAX_REUSE_SECONDS) -> list:
+    """
+    Run YOLO over sampled frames with decoding, inference and frame writing overlapped.
+    A decoder thread fills a bounded queue, the calling thread runs the model on batches of frames,
+    and a writer thread draws and saves annotated frames.
+    With a scene detector, frames that do not change the scene reuse the previous detections
+    instead of running the model (at most max_reuse_seconds in a row).
+    :param frames: Iterable of (frame_index, timestamp, frame) tuples, e.g. from sample_frames.
+    :param model: Loaded YOLO model.
+    :param output_dir: Folder for annotated frames; None disables the writer stage.
+    :param batch_size: Number of frames per model call.
+    :param queue_depth: Maximum number of frames waiting between stages.
+    :param conf: Detection confidence threshold.
+    :param scene_detector: Optional SceneChangeDetector gating the model calls.
+    :param max_reuse_seconds: Longest stretch of reused detections inside one scene.
+    :return: List of {"timestamp", "detections", "reused"} dictionaries in frame order.
+    """
+    batch_size = max(1, int(batch_size))
+    queue_depth = max(batch_size, int(queue_depth))
+    decoded = queue.Queue(maxsize=queue_depth)
+    annotated = queue.Queue(maxsize=queue_depth)
+    stop = threading.Event()
+
+    def decode():
+        try:
+            for frame_index, timestamp, frame in frames:
+                # The histogram check is cheap, so it runs on the decoder thread
+                new_scene = scene_detector.update(frame, timestamp) if scene_detector else True
+                if not _put(decoded, (frame_index, timestamp, frame, new_scene), stop):
+                    return
+        finally:
+            # Release the capture from the thread that used it
+            if hasattr(frames, "close"):
+                frames.close()
+            _put(decoded, _END, stop)
+
+    def write():
+        while True:
+            item = annotated.get()
+            if item is _END:
+                return
+            frame_index, frame, boxes, labels = item
+            annotate_frame(frame, boxes, labels)
+            cv2.imwrite(f"{output_dir}/frame_{frame_index}.jpg", frame)
+
+    decoder = _Stage(decode, "frame-decoder")
+    writer = _Stage(write, "frame-writer") if output_dir else None
+    decoder.start()
+    if writer:
+        writer.start()
+
+    results = []
+    last_labels = []
+    last_run_time = None
+    try:
+        finished = False
+        while not finished:
+            # Collect up to batch_size decoded frames
+            batch = []
+            while len(batch) < batch_size:
+                item = decoded.get()
+                if item is _END:
+                    finished = True
+                    break
+                batch.append(item)
+            if not batch:
+                break
+
+            # Decide which frames need the model: scene changes and stale reused results
+            run_flags = []
+            for _, timestamp, _, new_scene in batch:
+                stale = last_run_time is None or timestamp - last_run_time >= max_reuse_seconds
+                run_flags.append(new_scene or stale)
+                if run_flags[-1]:
+                    last_run_time = timestamp
+
+            to_predict = [frame for (_, _, frame, _), run in zip(batch, run_flags) if run]
+            predictions = iter(model.predict(to_predict, conf=conf, verbose=False) if to_predict else [])
+
+            for (frame_index, timestamp, frame, _), run in zip(batch, run_flags):
+                if run:
+                    prediction = next(predictions)
+                    last_labels = [prediction.names[int(cls)] for cls in prediction.boxes.cls]
+                results.append({
+                    "timestamp": round(timestamp, 3),  # Timestamp in seconds, from the frame PTS
+                    "detections": list(last_labels),  # Detected objects
+                    "reused": not run,
+                })
+                log_message(
+                    f"Frame {frame_index} at {timestamp:.2f}s: {', '.join(last_labels) or 'no objects'}",
+                    "DEBUG", category="detection", reused=not run,
+                )
+                # Reused frames look like the annotated frame before them, so they are not written again
+                if writer and run:
+                    boxes = [tuple(map(int, box.tolist())) for box in prediction.boxes.xyxy]
+                    _put(annotated, (frame_index, frame, boxes, last_labels), stop, writer)
+    finally:
+        if writer:
+            # Let the writer drain the remaining frames before shutting down
+            _put(annotated, _END, stop, writer)
+        stop.set()
+        decoder.join()
+        if writer:
+            writer.join()
+
+    for stage in (decoder, writer):
+        if stage is not None and stage.error is not None:
+            log_message(f"Error in detection stage {stage.name}: {str(stage.error)}", "ERROR")
+            raise stage.error
+    return results
@@ -0,0 +1,244 @@
+# app/services/export_service.py
+import csv
+import io
+import json
+import os
+
+from fastapi import HTTPException
+
+from app.config.config import EXPORT_FORMATS, EXPORT_ROW_GROUP_SIZE
+from app.utils.logger import log_message
+
+# Flat layout shared by every exporter. Metadata, transcript segments and detected issues
+# are told apart by record_type; columns that do not apply to a record are left empty.
+EXPORT_COLUMNS = [
+    ("record_type", "string"),
+    ("metadata_id", "string"),
+    ("status", "string"),
+    ("upload_timestamp", "string"),
+    ("width", "int64"),
+    ("height", "int64"),
+    ("frame_count", "int64"),
+    ("fps", "float64"),
+    ("duration_seconds", "float64"),
+    ("segment_index", "int64"),
+    ("start", "float64"),
+    ("end", "float64"),
+    ("text", "string"),
+    ("timestamp", "string"),
+    ("problem", "string"),
+]
+COLUMN_NAMES = [name for name, _ in EXPORT_COLUMNS]
+
+
+def metadata_row(metadata_id: str, video_info: dict, status: str = None, upload_timestamp: str = None) -> dict:
+    """
+    Flatten a video's metadata into one export row.
+    """
+    return {
+        "record_type": "metadata",
+        "metadata_id": metadata_id,
+        "status": status,
+        "upload_timestamp": upload_timestamp,
+        "width": video_info.get("width"),
+        "height": video_info.get("height"),
+        "frame_count": video_info.get("frame_count"),
+        "fps": video_info.get("fps"),
+        "duration_seconds": video_info.get("duration_seconds"),
+    }
+
+
+class _ChunkSink:
+    """
+    Minimal writable file object that hands out what was written so far, used to stream Parquet.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class JSONExporter:
+    extension = "json"
+    media_type = "application/x-ndjson"
+
+    def write(self, rows, path: str):
+        with open(path, "w") as f:
+            json.dump(list(rows), f, indent=2, default=str)
+
+    def stream(self, rows):
+        # JSON lines, so the output can be produced and consumed row by row
+        for row in rows:
+            yield (json.dumps(row, default=str) + "\n").encode()
+
+
+class CSVExporter:
+    extension = "csv"
+    media_type = "text/csv"
+
+    def write(self, rows, path: str):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMN_NAMES, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def stream(self, rows):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=COLUMN_NAMES, extrasaction="ignore")
+        writer.writeheader()
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % EXPORT_ROW_GROUP_SIZE == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+
+
+class ParquetExporter:
+    extension = "parquet"
+    media_type = "application/vnd.apache.parquet"
+
+    @staticmethod
+    def _schema():
+        import pyarrow as pa
+        return pa.schema([(name, getattr(pa, kind)()) for name, kind in EXPORT_COLUMNS])
+
+    def _table(self, rows: list, schema):
+        import pyarrow as pa
+        return pa.Table.from_pylist([{name: row.get(name) for name in COLUMN_NAMES} for row in rows], schema=schema)
+
+    def write(self, rows, path: str):
+        import pyarrow.parquet as pq
+        schema = self._schema()
+        pq.write_table(self._table(list(rows), schema), path)
+
+    def stream(self, rows):
+        import pyarrow.parquet as pq
+        schema = self._schema()
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= EXPORT_ROW_GROUP_SIZE:
+                # Each row group is written and sent before the next one is built
+                writer.write_table(self._table(batch, schema))
+                batch = []
+                yield sink.drain()
+        if batch:
+            writer.write_table(self._table(batch, schema))
+        writer.close()
+        yield sink.drain()
+
+
+class ExcelExporter:
+    extension = "xlsx"
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    def write(self, rows, path: str):
+        import pandas as pd
+        pd.DataFrame(list(rows), columns=COLUMN_NAMES).to_excel(path, index=False)
+
+    def stream(self, rows):
+        # openpyxl cannot stream, so Excel is only offered for single-video reports
+        raise HTTPException(status_code=400, detail="Excel is not supported for bulk export.")
+
+
+EXPORTERS = {
+    "json": JSONExporter(),
+    "csv": CSVExporter(),
+    "parquet": ParquetExporter(),
+    "excel": ExcelExporter(),
+}
+
+
+def get_exporter(export_format: str):
+    exporter = EXPORTERS.get(export_format)
+    if exporter is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported export format: {export_format}. Supported: {', '.join(EXPORTERS)}"
+        )
+    return exporter
+
+
+def export_video_report(metadata_id: str, video_info: dict, folder_path: str, formats: list = None) -> dict:
+    """
+    Write the metadata report of one video in each requested format.
+    :param metadata_id: Metadata ID of the video.
+    :param video_info: Video metadata from process_video.
+    :param folder_path: Metadata folder the reports are written to.
+    :param formats: Export formats; defaults to EXPORT_FORMATS.
+    :return: Mapping of format to report path.
+    """
+    rows = [metadata_row(metadata_id, video_info)]
+    report_files = {}
+    for export_format in formats if formats is not None else EXPORT_FORMATS:
+        exporter = get_exporter(export_format)
+        path = os.path.join(folder_path, f"{metadata_id}.{exporter.extension}")
+        try:
+            exporter.write(rows, path)
+        except Exception as e:
+            log_message(f"Error saving {export_format} report: {str(e)}", "ERROR")
+            raise HTTPException(status_code=500, detail=f"Failed to save {export_format} report.")
+        report_files[export_format] = path
+        log_message(f"Metadata saved as {export_format}: {path}")
+    return report_files
+
+
+def iter_export_rows(mongo_db, query: dict, batch_size: int = 100):
+    """
+    Yield metadata, transcript segment and detected issue rows for every matching video.
+    Videos are read in batches so memory use stays flat however many videos are exported.
+    """
+    cursor = mongo_db.find_documents(
+        'videoMetadata', query,
+        projection={"metadataId": 1, "status": 1, "uploadTimestamp": 1, "video_info": 1},
+        sort=[("metadataId", 1)],
+    )
+
+    def flush(videos):
+        ids = [video["metadataId"] for video in videos]
+        for video in videos:
+            yield metadata_row(video["metadataId"], video.get("video_info") or {}, video.get("status"), video.get("uploadTimestamp"))
+        for segment in mongo_db.find_documents('transcriptSegments', {"metadataId": {"$in": ids}}, sort=[("metadataId", 1), ("index", 1)]):
+            yield {
+                "record_type": "segment",
+                "metadata_id": segment["metadataId"],
+                "segment_index": segment.get("index"),
+                "start": segment.get("start"),
+                "end": segment.get("end"),
+                "text": segment.get("text"),
+            }
+        for issue in mongo_db.find_documents('detectedIssues', {"metadataId": {"$in": ids}}, sort=[("metadataId", 1)]):
+            yield {
+                "record_type": "issue",
+                "metadata_id": issue["metadataId"],
+                "timestamp": issue.get("timestamp"),
+                "problem": issue.get("problem"),
+            }
+
+    videos = []
+    for video in cursor:
+        videos.append(video)
+        if len(videos) >= batch_size:
+            yield from flush(videos)
+            videos = []
+    if videos:
+        yield from flush(videos)
@@ -0,0 +1,136 @@
+# app/services/frame_sampler.py
+import json
+import subprocess
+
+import cv2
+
+from app.config.config import FRAME_SAMPLING_MODE, FRAME_SAMPLE_FPS, FRAME_STRIDE, FRAME_SEEK_INTERVAL
+from app.utils.logger import log_message
+
+SAMPLING_MODES = ("fps", "keyframes", "stride")
+
+
+def _frame_time(cap) -> float:
+    # Presentation timestamp of the frame that was just grabbed, in seconds
+    return cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+
+def _frame_index(cap) -> int:
+    return int(cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+
+
+def list_keyframe_times(video_path: str) -> list:
+    """
+    List the presentation times of all keyframes by reading packet flags with ffprobe (no decoding).
+    Times are relative to the start of the stream, like the positions OpenCV seeks to and reports.
+    :param video_path: Path to the video file.
+    :return: Sorted keyframe times in seconds.
+    """
+    command = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=start_time:packet=pts_time,flags",
+        "-of", "json",
+        video_path,
+    ]
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True, text=True)
+    probe = json.loads(process.stdout or "{}")
+    streams = probe.get("streams") or [{}]
+    # pts_time is absolute stream time, which starts after zero in e.g. MPEG-TS or trimmed files
+    start_time = _to_seconds(streams[0].get("start_time")) or 0.0
+    times = []
+    for packet in probe.get("packets", []):
+        pts_time = _to_seconds(packet.get("pts_time"))
+        if "K" in packet.get("flags", "") and pts_time is not None:
+            times.append(max(pts_time - start_time, 0.0))
+    return sorted(times)
+
+
+def _to_seconds(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _sample_by_seek(cap, target_times):
+    for target in target_times:
+        cap.set(cv2.CAP_PROP_POS_MSEC, target * 1000.0)
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield _frame_index(cap), _frame_time(cap), frame
+
+
+def _sample_by_time(cap, sample_fps: float, duration: float):
+    interval = 1.0 / sample_fps
+    if interval >= FRAME_SEEK_INTERVAL and duration:
+        # Sparse sampling: seeking is cheaper than decoding everything in between
+        target_times = [i * interval for i in range(int(duration / interval) + 1)]
+        yield from _sample_by_seek(cap, target_times)
+        return
+
+    # Dense sampling: grab() still demuxes and decodes every frame, but only the frames
+    # we keep pay for retrieve()'s conversion to BGR
+    next_time = 0.0
+    while cap.grab():
+        timestamp = _frame_time(cap)
+        if timestamp + 1e-6 < next_time:
+            continue
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+        yield _frame_index(cap), timestamp, frame
+        while next_time <= timestamp + 1e-6:
+            next_time += interval
+
+
+def _sample_by_stride(cap, frame_stride: int):
+    index = -1
+    while cap.grab():
+        index += 1
+        if index % frame_stride:
+            continue
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+        yield index, _frame_time(cap), frame
+
+
+def sample_frames(video_path: str, mode: str = FRAME_SAMPLING_MODE, sample_fps: float = FRAME_SAMPLE_FPS,
+                  frame_stride: int = FRAME_STRIDE, duration: float = None):
+    """
+    Yield sampled frames of a video with timestamps taken from the container PTS.
+    Modes:
+      - "fps": a fixed number of frames per second of video, seeking when samples are sparse.
+      - "keyframes": only the keyframes of the video.
+      - "stride": every Nth frame; the others are decoded by grab() but never converted to BGR.
+    :param video_path: Path to the video file.
+    :param mode: One of SAMPLING_MODES.
+    :param sample_fps: Frames per second to keep in "fps" mode.
+    :param frame_stride: Keep one frame out of this many in "stride" mode.
+    :param duration: Video duration in seconds, from probe_media when already known.
+    :return: Generator of (frame_index, timestamp_seconds, frame) tuples.
+    """
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode: {mode}. Supported: {', '.join(SAMPLING_MODES)}")
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise Exception("Could not open video file!")
+
+    try:
+        if mode == "keyframes":
+            keyframe_times = list_keyframe_times(video_path)
+            log_message(f"Sampling {len(keyframe_times)} keyframes from {video_path}")
+            yield from _sample_by_seek(cap, keyframe_times)
+        elif mode == "stride":
+            yield from _sample_by_stride(cap, max(1, int(frame_stride)))
+        else:
+            if duration is None:
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+                duration = frame_count / fps if fps else 0
+            yield from _sample_by_time(cap, max(float(sample_fps), 1e-3), duration)
+    finally:
+        cap.release()
@@ -1,5 +1,19 @@
 import json
-from transformers import pipeline
+from app.config.config import CLASSIFICATION_BATCH_SIZE, CLASSIFICATION_WINDOW_TOKENS, CLASSIFICATION_WINDOW_OVERLAP
+from app.services.classification_cache import cached_classify
+from app.services.model_registry import model_registry, classifier_id, TOXICITY_MODEL_ID
+from app.utils.batching import run_pipeline_in_batches, sliding_windows
+
+def _classify_toxicity(texts: list, batch_size: int) -> list:
+    # Use the resident toxicity model to predict the toxicity of the texts
+    with model_registry.use("toxicity") as toxicity_pipeline:
+        analyses = run_pipeline_in_batches(toxicity_pipeline, texts, batch_size)
+    # hate_speech_pipeline = pipeline("text-classification", model="facebook/roberta-hate-speech-detection")
+    # profanity_pipeline = pipeline("text-classification", model="microsoft/DialoGPT-medium")  # Adjust with an actual profanity model if available
+
+    # You can add additional fields like profanity, hate speech, etc., if your model supports them
+    # For now, we assume the model returns toxicity score and label.
+    return [{"toxicity_score": analysis['score'], "label": "toxicity"} for analysis in analyses]
 
 def analyze_harmful_content(text: str) -> dict:
     """
@@ -8,29 +22,54 @@ def analyze_harmful_content(text: str) -> dict:
     :return: A dictionary with the analysis results.
     """
     try:
-        # Load the toxicity analysis model from Hugging Face
-        toxicity_pipeline = pipeline("text-classification", model="unitary/toxic-bert")
-
-        # Use the model to predict the toxicity of the text
-        analysis = toxicity_pipeline(text)
-        # hate_speech_pipeline = pipeline("text-classification", model="facebook/roberta-hate-speech-detection")
-        # profanity_pipeline = pipeline("text-classification", model="microsoft/DialoGPT-medium")  # Adjust with an actual profanity model if available
-
-        # Extract the result and return in a structured format
-        result = {
-            "toxicity_score": analysis[0]['score'],
-            "label": "toxicity"
-        }
-
-        # You can add additional fields like profanity, hate speech, etc., if your model supports them
-        # For now, we assume the model returns toxicity score and label.
-        return result
+        return cached_classify(classifier_id(TOXICITY_MODEL_ID), [text], lambda texts: _classify_toxicity(texts, 1))[0]
 
     except Exception as e:
         return {"error": str(e)}
 
-# Test the function
-text = "I got new job."
-result = analyze_harmful_content(text)
-print(result)
-    
\ No newline at end of file
+def analyze_harmful_content_batch(texts: list, batch_size: int = CLASSIFICATION_BATCH_SIZE) -> list:
+    """
+    Analyze harmful content for many texts with batched forward passes.
+    Texts seen before (by this or another worker) are served from the classification cache.
+    :param texts: The input texts to analyze.
+    :param batch_size: Number of texts per forward pass.
+    :return: One result dictionary per text, in the same shape as analyze_harmful_content.
+    """
+    try:
+        return cached_classify(classifier_id(TOXICITY_MODEL_ID), texts, lambda pending: _classify_toxicity(pending, batch_size))
+
+    except Exception as e:
+        return [{"error": str(e)} for _ in texts]
+
+def analyze_harmful_content_windowed(text: str, window_tokens: int = CLASSIFICATION_WINDOW_TOKENS,
+                                     overlap: int = CLASSIFICATION_WINDOW_OVERLAP,
+                                     batch_size: int = CLASSIFICATION_BATCH_SIZE) -> dict:
+    """
+    Analyze harmful content of a text longer than the model limit, such as a full transcript.
+    The text is scored in overlapping windows and the most toxic window decides the score.
+    :param text: The input text to analyze.
+    :param window_tokens: Maximum tokens per window.
+    :param overlap: Tokens shared by consecutive windows.
+    :param batch_size: Number of windows per forward pass.
+    :return: The analysis result with the scores of each window and its character offsets.
+    """
+    try:
+        with model_registry.use("toxicity") as toxicity_pipeline:
+            windows = sliding_windows(toxicity_pipeline.tokenizer, text, window_tokens, overlap)
+        results = analyze_harmful_content_batch([text[start:end] for start, end, _ in windows], batch_size)
+
+        scored = [
+            {"start": start, "end": end, "toxicity_score": result["toxicity_score"]}
+            for (start, end, _), result in zip(windows, results)
+            if "error" not in result
+        ]
+        if not scored:
+            return results[0] if results else {"error": "Nothing to analyze"}
+        return {
+            "toxicity_score": max(window["toxicity_score"] for window in scored),
+            "label": "toxicity",
+            "windows": scored,
+        }
+
+    except Exception as e:
+        return {"error": str(e)}
@@ -1,11 +1,69 @@
-import requests
 import json
-import openai
-from app.config.config import WHISPER_API_KEY
-from app.config.config import MONGO_URI
-from pymongo import MongoClient
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config.config import get_setting
+from app.config.config import OPENAI_MODERATION_MODEL, OPENAI_BATCH_SIZE, OPENAI_MAX_CONCURRENCY, OPENAI_CACHE_SIZE
+from app.utils.logger import log_message
+from app.utils.text_utils import text_hash
+
+SYSTEM_PROMPT = (
+    "You are an assistant that analyzes text for harmful content. Respond with a JSON object "
+    "containing scores for 'toxicity', 'profanity', 'hate_speech', and 'insults'."
+)
+BATCH_SYSTEM_PROMPT = (
+    "You are an assistant that analyzes text for harmful content. You receive a JSON object with a "
+    "'segments' list of {'id', 'text'} items. Respond with a JSON object mapping every segment id to an "
+    "object containing scores for 'toxicity', 'profanity', 'hate_speech', and 'insults'."
+)
+
+# Results by hash of the normalized text; errors are never cached
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Requests in flight to the API from the whole process, however many jobs call in at once
+_request_slots = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY)
+# Shared by all analyze_segments calls, so packed requests of concurrent jobs queue up here
+_executor = ThreadPoolExecutor(max_workers=OPENAI_MAX_CONCURRENCY, thread_name_prefix="openai-request")
+
+
+def _cache_get(key: str):
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+        return result
+
+
+def _cache_put(key: str, result: dict):
+    if "error" in result:
+        return
+    with _cache_lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        while len(_cache) > OPENAI_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _chat(system_prompt: str, content: str) -> dict:
+    import openai
+    # The key is read on first use (and refreshed with the configuration)
+    openai.api_key = get_setting("WHISPER_API_KEY")
+
+    with _request_slots:
+        response = openai.ChatCompletion.create(
+            model=OPENAI_MODERATION_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": content}
+            ],
+            temperature=0
+        )
+
+    # Extract the response content
+    return json.loads(response['choices'][0]['message']['content'])
 
-openai.api_key = WHISPER_API_KEY
 
 def analyze_harmful_content(text: str) -> dict:
     """
@@ -13,31 +71,78 @@ def analyze_harmful_content(text: str) -> dict:
     :param text: The input text to analyze.
     :return: A dictionary with the analysis results.
     """
+    key = text_hash(text)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
     try:
-        # Use GPT-3.5 Turbo for analysis
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an assistant that analyzes text for harmful content. Respond with a JSON object containing scores for 'toxicity', 'profanity', 'hate_speech', and 'insults'."
-                },
-                {
-                    "role": "user",
-                    "content": text
-                }
-            ],
-            temperature=0
-        )
+        result = _chat(SYSTEM_PROMPT, text)
+    except Exception as e:
+        return {"error": str(e)}
+    _cache_put(key, result)
+    return result
 
-        # Extract the response content
-        analysis = response['choices'][0]['message']['content']
-        return json.loads(analysis)
 
+def _analyze_packed(batch: list) -> dict:
+    """
+    Score one packed request of (id, text) pairs.
+    :return: Scores keyed by id; ids missing from the reply get an error entry.
+    """
+    payload = json.dumps({"segments": [{"id": segment_id, "text": text} for segment_id, text in batch]})
+    try:
+        analysis = _chat(BATCH_SYSTEM_PROMPT, payload)
     except Exception as e:
-        return {"error": str(e)}
+        log_message(f"Error analyzing batch of {len(batch)} segments: {str(e)}", "ERROR")
+        return {segment_id: {"error": str(e)} for segment_id, _ in batch}
+
+    results = {}
+    for segment_id, _ in batch:
+        scores = analysis.get(segment_id) if isinstance(analysis, dict) else None
+        results[segment_id] = scores if isinstance(scores, dict) else {"error": "Segment missing from the response"}
+    return results
 
-# Test the function
-text = "You're such an idiot! Nobody likes you."
-result = analyze_harmful_content(text)
-print(result)
+
+def analyze_segments(segments: dict, batch_size: int = OPENAI_BATCH_SIZE) -> dict:
+    """
+    Analyze many segments with a few packed requests instead of one request per segment.
+    Cached and duplicate texts are only sent once, and at most OPENAI_MAX_CONCURRENCY requests
+    run at a time across all callers.
+    :param segments: Mapping of segment ID to text.
+    :param batch_size: Segments packed into one request.
+    :return: Analysis result per segment ID.
+    """
+    keys = {segment_id: text_hash(text) for segment_id, text in segments.items()}
+    results_by_key = {}
+    pending = {}
+    for segment_id, key in keys.items():
+        if key in results_by_key or key in pending:
+            continue
+        cached = _cache_get(key)
+        if cached is not None:
+            results_by_key[key] = cached
+        else:
+            pending[key] = segments[segment_id]
+
+    # Short positional ids keep the prompt small; they are mapped back to the text hashes below
+    pending_keys = list(pending)
+    batch_size = max(1, int(batch_size))
+    batches = [
+        [(str(i), pending[pending_keys[i]]) for i in range(start, min(start + batch_size, len(pending_keys)))]
+        for start in range(0, len(pending_keys), batch_size)
+    ]
+    for batch_results in _executor.map(_analyze_packed, batches):
+        for position, result in batch_results.items():
+            key = pending_keys[int(position)]
+            results_by_key[key] = result
+            _cache_put(key, result)
+
+    return {segment_id: results_by_key[key] for segment_id, key in keys.items()}
+
+
+def analyze_harmful_content_batch(texts: list, batch_size: int = OPENAI_BATCH_SIZE) -> list:
+    """
+    List form of analyze_segments.
+    :return: One analysis result per input text, in the original order.
+    """
+    results = analyze_segments({str(i): text for i, text in enumerate(texts)}, batch_size=batch_size)
+    return [results[str(i)] for i in range(len(texts))]
@@ -1,51 +1,221 @@
-import requests
-import json
-from app.config.config import PERSPECTIVE_API_KEY
-from app.config.config import MONGO_URI
-from pymongo import MongoClient
+import asyncio
+import random
+import threading
+import time
 
-def analyze_harmful_content(text: str) -> dict:
+from app.config.config import get_setting
+from app.config.config import (
+    PERSPECTIVE_API_URL, PERSPECTIVE_QPS, PERSPECTIVE_MAX_CONCURRENCY,
+    PERSPECTIVE_MAX_RETRIES, PERSPECTIVE_BACKOFF_SECONDS, PERSPECTIVE_TIMEOUT_SECONDS,
+)
+from app.utils.logger import log_message
+
+ATTRIBUTES = {
+    "toxicity": "TOXICITY",
+    "severe_toxicity": "SEVERE_TOXICITY",
+    "identity_attack": "IDENTITY_ATTACK",
+    "insult": "INSULT",
+    "profanity": "PROFANITY",
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class _RateLimiter:
     """
-    Analyzes harmful content using Perspective API.
-    :param text: Input text to analyze.
-    :return: Harmful content analysis result (e.g., hate speech, NSFW).
+    Spaces request starts at least 1 / qps seconds apart across all coroutines of a client.
+    """
+
+    def __init__(self, qps: float):
+        self.interval = 1.0 / qps if qps > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _parse_scores(analysis: dict) -> dict:
+    # Validate that 'attributeScores' exists in the response
+    if "attributeScores" not in analysis:
+        return {"error": "attributeScores not found in the response"}
+    scores = analysis["attributeScores"]
+    return {name: scores[attribute]["summaryScore"]["value"] for name, attribute in ATTRIBUTES.items()}
+
+
+def _retry_delay(response, attempt: int, backoff: float) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    # Exponential backoff with jitter so parallel requests do not retry in lockstep
+    return backoff * (2 ** attempt) * (0.5 + random.random())
+
+
+class PerspectiveClient:
     """
-    try:
-        url = "https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze"
-        params = {"key": PERSPECTIVE_API_KEY}
+    Async Perspective API client sharing one connection pool.
+    Requests are limited to `qps` per second and `max_concurrency` in flight, and
+    429 / 5xx responses and transport errors are retried with exponential backoff.
+    """
+
+    def __init__(self, api_key: str = None, url: str = PERSPECTIVE_API_URL, qps: float = PERSPECTIVE_QPS,
+                 max_concurrency: int = PERSPECTIVE_MAX_CONCURRENCY, max_retries: int = PERSPECTIVE_MAX_RETRIES,
+                 backoff_seconds: float = PERSPECTIVE_BACKOFF_SECONDS, timeout_seconds: float = PERSPECTIVE_TIMEOUT_SECONDS):
+        import httpx
+        self.api_key = api_key
+        self.url = url
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._limiter = _RateLimiter(qps)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=timeout_seconds,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+
+    async def analyze(self, text: str) -> dict:
+        """
+        Analyzes harmful content using Perspective API.
+        :param text: Input text to analyze.
+        :return: Harmful content analysis result, or {"error": ...} on failure.
+        """
+        import httpx
         data = {
             "comment": {"text": text},
             "languages": ["en"],
-            "requestedAttributes": {
-                "TOXICITY": {},
-                "SEVERE_TOXICITY": {},
-                "IDENTITY_ATTACK": {},
-                "INSULT": {},
-                "PROFANITY": {}
-            }
+            "requestedAttributes": {attribute: {} for attribute in ATTRIBUTES.values()},
         }
+        params = {"key": self.api_key if self.api_key is not None else get_setting("PERSPECTIVE_API_KEY")}
 
-        response = requests.post(url, params=params, json=data)
-        response.raise_for_status()  # Raise an error for HTTP issues
-        analysis = response.json()
-
-        # Validate that 'attributeScores' exists in the response
-        if "attributeScores" not in analysis:
-            return {"error": "attributeScores not found in the response"}
-
-        # Extract useful data
-        result = {
-            "toxicity": analysis["attributeScores"]["TOXICITY"]["summaryScore"]["value"],
-            "severe_toxicity": analysis["attributeScores"]["SEVERE_TOXICITY"]["summaryScore"]["value"],
-            "identity_attack": analysis["attributeScores"]["IDENTITY_ATTACK"]["summaryScore"]["value"],
-            "insult": analysis["attributeScores"]["INSULT"]["summaryScore"]["value"],
-            "profanity": analysis["attributeScores"]["PROFANITY"]["summaryScore"]["value"]
-        }
-        return result
-
-    except requests.exceptions.RequestException as e:
-        return {"error": f"HTTP error: {str(e)}"}
-    except KeyError as e:
-        return {"error": f"Missing key in response: {str(e)}"}
-    except Exception as e:
-        return {"error": f"Unexpected error: {str(e)}"}
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._limiter.wait()
+                response = None
+                try:
+                    response = await self._client.post(self.url, params=params, json=data)
+                    if response.status_code not in RETRY_STATUS_CODES:
+                        response.raise_for_status()  # Raise an error for HTTP issues
+                        return _parse_scores(response.json())
+                    error = f"HTTP {response.status_code}"
+                except httpx.HTTPStatusError as e:
+                    return {"error": f"HTTP error: {str(e)}"}
+                except httpx.TransportError as e:
+                    error = f"HTTP error: {str(e)}"
+                except KeyError as e:
+                    return {"error": f"Missing key in response: {str(e)}"}
+                except Exception as e:
+                    return {"error": f"Unexpected error: {str(e)}"}
+
+                if attempt == self.max_retries:
+                    break
+                delay = _retry_delay(response, attempt, self.backoff_seconds)
+                log_message(f"Perspective request failed ({error}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        return {"error": f"Perspective API unavailable after {self.max_retries + 1} attempts: {error}"}
+
+    async def analyze_many(self, texts: list) -> list:
+        """
+        Score a list of texts concurrently, within the client's rate and concurrency limits.
+        :return: Results in the same order as texts.
+        """
+        return list(await asyncio.gather(*(self.analyze(text) for text in texts)))
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+# One client, connection pool and rate limiter per process, running on a dedicated event loop
+# thread so that sync callers, worker threads and request handlers all share them
+_client = None
+_client_loop = None
+_client_lock = threading.Lock()
+
+
+def _start_client_loop():
+    global _client, _client_loop
+    with _client_lock:
+        if _client_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="perspective-client", daemon=True).start()
+
+            async def create():
+                return PerspectiveClient()
+
+            _client = asyncio.run_coroutine_threadsafe(create(), loop).result()
+            _client_loop = loop
+    return _client_loop
+
+
+def _submit(method: str, *args):
+    # Schedule a client coroutine on the client loop, from any thread
+    loop = _start_client_loop()
+    return asyncio.run_coroutine_threadsafe(getattr(_client, method)(*args), loop)
+
+
+def get_perspective_client() -> PerspectiveClient:
+    """
+    Return the shared client. Its coroutines must run on the client loop; use the module functions instead
+    of awaiting them directly.
+    """
+    _start_client_loop()
+    return _client
+
+
+def close_perspective_client():
+    """
+    Close the shared client and stop its event loop. Called at shutdown.
+    """
+    global _client, _client_loop
+    with _client_lock:
+        if _client_loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(_client.aclose(), _client_loop).result(timeout=5)
+        except Exception as e:
+            log_message(f"Error closing the Perspective client: {str(e)}", "ERROR")
+        _client_loop.call_soon_threadsafe(_client_loop.stop)
+        _client, _client_loop = None, None
+
+
+async def analyze_harmful_content_async(text: str) -> dict:
+    return await asyncio.wrap_future(_submit("analyze", text))
+
+
+async def analyze_harmful_content_batch_async(texts: list) -> list:
+    return await asyncio.wrap_future(_submit("analyze_many", texts))
+
+
+def analyze_harmful_content_batch(texts: list) -> list:
+    """
+    Score a list of texts concurrently from synchronous code (e.g. a worker thread).
+    Blocks the calling thread only, so it is also safe to call while an event loop is running.
+    :param texts: Input texts to analyze.
+    :return: Harmful content analysis results, in the same order as texts.
+    """
+    return _submit("analyze_many", texts).result()
+
+
+def analyze_harmful_content(text: str) -> dict:
+    """
+    Analyzes harmful content using Perspective API.
+    :param text: Input text to analyze.
+    :return: Harmful content analysis result (e.g., hate speech, NSFW).
+    """
+    return _submit("analyze", text).result()
@@ -0,0 +1,236 @@
+# app/services/job_service.py
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+from app.config.config import JOB_WORKERS, JOB_QUEUE_LIMIT, JOB_HEARTBEAT_SECONDS, JOB_STALE_SECONDS
+from app.services.video_analysis_service import run_video_pipeline
+from app.utils.logger import log_message, log_context
+from app.utils.metrics import JOBS_QUEUED, JOBS_IN_FLIGHT, JOBS_FINISHED
+from app.utils.mongo_utils import MongoDB, AsyncMongoDB
+
+# Bounded worker pool shared by all video analysis jobs of this process
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="video-job")
+_job_slots = threading.BoundedSemaphore(JOB_QUEUE_LIMIT)
+
+ACTIVE_JOB_STATUSES = ("queued", "processing")
+
+
+def update_job(metadata_id: str, **fields):
+    """
+    Update the job tracking fields on the videoMetadata document.
+    """
+    fields.setdefault("updated_at", time.time())
+    try:
+        mongo_db = MongoDB()
+        mongo_db.update_document('videoMetadata', {"metadataId": metadata_id}, fields)
+    except Exception as e:
+        log_message(f"Error updating job {metadata_id}: {str(e)}", "ERROR")
+
+
+def is_job_active(document: dict) -> bool:
+    """
+    True while a worker is queued or running on the video; jobs that stopped refreshing
+    updated_at (e.g. lost in a restart) count as finished.
+    """
+    if not document or document.get("status") not in ACTIVE_JOB_STATUSES:
+        return False
+    return document.get("updated_at", 0) >= time.time() - JOB_STALE_SECONDS
+
+
+def claim_video_job(metadata_id: str, status: str = "queued") -> bool:
+    """
+    Atomically mark an already known video as being reprocessed.
+    :param metadata_id: Metadata ID of the existing videoMetadata document.
+    :param status: "queued" for background jobs, "processing" when analyzed in the request.
+    :return: False when another job is still working on the video; its files must not be touched.
+    """
+    query = {
+        "metadataId": metadata_id,
+        "$or": [
+            {"status": {"$nin": list(ACTIVE_JOB_STATUSES)}},
+            # Also matches documents without updated_at
+            {"updated_at": {"$not": {"$gte": time.time() - JOB_STALE_SECONDS}}},
+        ],
+    }
+    fields = {"status": status, "stage": status, "progress": 0.0, "error": None, "updated_at": time.time()}
+    return MongoDB().update_document('videoMetadata', query, fields) == 1
+
+
+def register_job(video_file_path: str, metadata_id: str, content_hash: str = None, status: str = "queued"):
+    """
+    Create or update the job tracking fields of a video, keeping the rest of its document.
+    """
+    fields = {
+        "video_file_path": video_file_path,
+        "status": status,
+        "stage": status,
+        "progress": 0.0,
+        "error": None,
+        "processedTimestamp": "",
+        "updated_at": time.time(),
+    }
+    if content_hash:
+        fields["contentHash"] = content_hash
+    MongoDB().upsert_fields(
+        'videoMetadata',
+        {"metadataId": metadata_id},
+        fields,
+        insert_fields={"uploadTimestamp": datetime.datetime.now().isoformat()},
+    )
+
+
+def start_job_heartbeat(metadata_id: str, interval: float = JOB_HEARTBEAT_SECONDS) -> threading.Event:
+    """
+    Refresh updated_at from a background thread until the returned event is set.
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            update_job(metadata_id)
+
+    threading.Thread(target=beat, name=f"job-heartbeat-{metadata_id}", daemon=True).start()
+    return stop
+
+
+@contextmanager
+def job_heartbeat(metadata_id: str, interval: float = JOB_HEARTBEAT_SECONDS):
+    """
+    Refresh updated_at in the background while the block runs, so long stages are not taken for a dead job.
+    """
+    stop = start_job_heartbeat(metadata_id, interval)
+    try:
+        yield
+    finally:
+        stop.set()
+
+
+def fail_stale_jobs() -> int:
+    """
+    Mark queued/processing jobs that stopped refreshing updated_at as failed. Called at startup,
+    since the worker pool of a previous process does not survive a restart.
+    :return: Number of jobs marked as failed.
+    """
+    try:
+        query = {
+            "status": {"$in": list(ACTIVE_JOB_STATUSES)},
+            "updated_at": {"$not": {"$gte": time.time() - JOB_STALE_SECONDS}},
+        }
+        fields = {
+            "status": "failed",
+            "error": "Interrupted before completion. Upload the video again to reprocess it.",
+            "processedTimestamp": datetime.datetime.now().isoformat(),
+            "updated_at": time.time(),
+        }
+        failed = MongoDB().update_documents('videoMetadata', query, fields)
+    except Exception as e:
+        log_message(f"Error recovering stale jobs: {str(e)}", "ERROR")
+        return 0
+    if failed:
+        log_message(f"Marked {failed} interrupted video analysis jobs as failed")
+    return failed
+
+
+def submit_video_job(video_file_path: str, metadata_id: str, content_hash: str = None) -> dict:
+    """
+    Queue the video analysis pipeline on the background worker pool.
+    :param video_file_path: Path to the uploaded video inside its metadata folder.
+    :param metadata_id: Metadata ID of the upload.
+    :param content_hash: SHA-256 of the upload.
+    :return: Dictionary describing the queued job.
+    """
+    if not _job_slots.acquire(blocking=False):
+        log_message(f"Job queue full, rejecting {metadata_id}", "ERROR")
+        # Release a claim taken on an existing video so the next upload can retry
+        update_job(metadata_id, status="failed", error="Job queue full")
+        raise HTTPException(status_code=503, detail="Too many videos are being processed. Try again later.")
+
+    queued = False
+    try:
+        register_job(video_file_path, metadata_id, content_hash, status="queued")
+        JOBS_QUEUED.inc()
+        queued = True
+        future = _executor.submit(_run_job, video_file_path, metadata_id, content_hash)
+    except Exception as e:
+        _job_slots.release()
+        if queued:
+            JOBS_QUEUED.dec()
+        if isinstance(e, DuplicateKeyError):
+            # A concurrent upload of the same content was registered first; the caller returns its job
+            raise
+        log_message(f"Error submitting job {metadata_id}: {str(e)}", "ERROR")
+        raise HTTPException(status_code=500, detail="Failed to queue video analysis.")
+
+    # Heartbeat from submission on, so a job waiting for a worker is not taken for a dead one
+    heartbeat = start_job_heartbeat(metadata_id)
+
+    def finished(_):
+        heartbeat.set()
+        _job_slots.release()
+
+    future.add_done_callback(finished)
+    log_message(f"Video analysis job queued: {metadata_id}")
+    return {"metadata_id": metadata_id, "status": "queued", "status_url": f"/jobs/{metadata_id}"}
+
+
+def _run_job(video_file_path: str, metadata_id: str, content_hash: str = None):
+    def on_stage(stage, progress):
+        update_job(metadata_id, status="processing", stage=stage, progress=progress)
+
+    JOBS_QUEUED.dec()
+    JOBS_IN_FLIGHT.inc()
+    try:
+        with log_context(metadata_id=metadata_id):
+            run_video_pipeline(video_file_path, metadata_id, content_hash, on_stage=on_stage)
+        JOBS_FINISHED.labels("processed").inc()
+        log_message(f"Video analysis job completed: {metadata_id}")
+    except Exception as e:
+        JOBS_FINISHED.labels("failed").inc()
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        log_message(f"Video analysis job failed: {metadata_id}: {detail}", "ERROR")
+        update_job(
+            metadata_id,
+            status="failed",
+            error=detail,
+            processedTimestamp=datetime.datetime.now().isoformat(),
+        )
+    finally:
+        JOBS_IN_FLIGHT.dec()
+
+
+async def get_job_status(metadata_id: str):
+    """
+    Read the stage-level status of a job from MongoDB without blocking the event loop.
+    :param metadata_id: Metadata ID returned on submission.
+    :return: Job status dictionary, or None if the ID is unknown.
+    """
+    document = await AsyncMongoDB().find_document('videoMetadata', {"metadataId": metadata_id})
+    if not document:
+        return None
+
+    status = {
+        "metadata_id": metadata_id,
+        "status": document.get("status"),
+        "stage": document.get("stage"),
+        "progress": document.get("progress", 0.0),
+        "uploadTimestamp": document.get("uploadTimestamp"),
+        "processedTimestamp": document.get("processedTimestamp"),
+    }
+    if document.get("status") in ACTIVE_JOB_STATUSES and not is_job_active(document):
+        # The worker running it is gone; fail_stale_jobs records this at the next startup
+        status["status"] = "failed"
+        status["error"] = "Interrupted before completion. Upload the video again to reprocess it."
+    elif document.get("error"):
+        status["error"] = document["error"]
+    if document.get("status") == "processed":
+        status["video_info"] = document.get("video_info", {})
+        status["audio_file_url"] = document.get("audio_file_url", "")
+        status["results"] = document.get("results", {})
+        status["stage_timings"] = document.get("stage_timings", {})
+    return status
@@ -0,0 +1,281 @@
+# app/services/model_registry.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from app.config.config import MODEL_PRELOAD, MODEL_WARMUP, MODEL_MEMORY_BUDGET_MB, WHISPER_MODEL_SIZE
+from app.config.config import MODEL_PRELOAD_BACKGROUND, TEXT_CLASSIFIER_BACKEND, ONNX_QUANTIZE
+from app.utils.logger import log_message
+from app.utils.metrics import MODEL_LOADS, MODEL_LOAD_SECONDS, MODEL_EVICTIONS
+
+# Hugging Face checkpoints of the text classifiers, also used to key cached results
+TOXICITY_MODEL_ID = "unitary/toxic-bert"
+SENTIMENT_MODEL_ID = "distilbert-base-uncased"
+
+
+def _load_whisper():
+    import whisper
+    return whisper.load_model(WHISPER_MODEL_SIZE)
+
+
+def warm_whisper(model):
+    import numpy as np
+    # One second of silence is enough to build the decoder graph
+    model.transcribe(np.zeros(16000, dtype=np.float32), fp16=False)
+
+
+def load_text_classifier(task: str, model_id: str, backend: str = TEXT_CLASSIFIER_BACKEND):
+    """
+    Load a text-classification pipeline on the configured backend ("transformers" or "onnx").
+    """
+    if backend == "onnx":
+        from app.services.onnx_backend import load_onnx_pipeline
+        return load_onnx_pipeline(task, model_id)
+    from transformers import pipeline
+    return pipeline(task, model=model_id)
+
+
+def classifier_id(model_id: str, backend: str = TEXT_CLASSIFIER_BACKEND) -> str:
+    """
+    Identify a classifier together with its backend, so results of a quantized model are
+    never served for (or from) the original one.
+    """
+    if backend == "onnx":
+        return f"{model_id}+onnx-int8" if ONNX_QUANTIZE else f"{model_id}+onnx"
+    return model_id
+
+
+def _load_toxicity():
+    return load_text_classifier("text-classification", TOXICITY_MODEL_ID)
+
+
+def _load_sentiment():
+    return load_text_classifier("sentiment-analysis", SENTIMENT_MODEL_ID)
+
+
+def _warm_text_pipeline(model):
+    model("warm up")
+
+
+def _load_yolo():
+    from ultralytics import YOLO
+    return YOLO("yolov8n.pt")
+
+
+def _warm_yolo(model):
+    import numpy as np
+    model.predict(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+
+
+def estimate_model_bytes(model) -> int:
+    """
+    Estimate the resident size of a model from its parameters and buffers.
+    Works for torch modules, ONNX Runtime models and wrappers (pipelines, YOLO) exposing one as `.model`.
+    :param model: Loaded model object.
+    :return: Size in bytes, 0 if it cannot be determined.
+    """
+    module = model
+    for _ in range(3):
+        if hasattr(module, "parameters") and callable(module.parameters):
+            break
+        # ONNX Runtime models keep their weights in the exported file
+        model_path = getattr(module, "model_path", None)
+        if model_path is not None:
+            try:
+                return os.path.getsize(model_path)
+            except OSError:
+                return 0
+        module = getattr(module, "model", None)
+        if module is None:
+            return 0
+    try:
+        size = sum(p.numel() * p.element_size() for p in module.parameters())
+        size += sum(b.numel() * b.element_size() for b in module.buffers())
+        return size
+    except Exception:
+        return 0
+
+
+class _Entry:
+    def __init__(self, model, size_bytes: int):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.pins = 0
+        self.last_used = time.monotonic()
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models.
+    Each model is loaded once per worker, optionally warmed up, and evicted in
+    least-recently-used order when the resident size exceeds the memory budget.
+    Models registered as not thread-safe run one inference at a time through use().
+    """
+
+    def __init__(self, memory_budget_bytes: int = 0):
+        self.memory_budget_bytes = memory_budget_bytes
+        self._loaders = {}
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks = {}
+        self._inference_locks = {}
+
+    def register(self, name: str, loader, warmup=None, thread_safe: bool = True):
+        """
+        Register a loader (and optional warm-up callable) under a model name.
+        :param thread_safe: False for models keeping per-call state (Whisper hooks, the YOLO
+            predictor); use() then holds a per-model lock for the whole inference.
+        """
+        with self._lock:
+            self._loaders[name] = (loader, warmup)
+            self._load_locks.setdefault(name, threading.Lock())
+            if thread_safe:
+                self._inference_locks.pop(name, None)
+            else:
+                self._inference_locks.setdefault(name, threading.Lock())
+
+    def ensure_registered(self, name: str, loader, warmup=None, thread_safe: bool = True):
+        """
+        Register a loader unless the name is already known, for models created on demand.
+        """
+        with self._lock:
+            if name not in self._loaders:
+                self.register(name, loader, warmup, thread_safe)
+
+    def get(self, name: str, warmup: bool = False):
+        """
+        Return the resident model, loading it on first use.
+        Inference should go through use(), which also serializes models that are not thread-safe.
+        :param name: Registered model name.
+        :param warmup: Run the warm-up inference when the model gets loaded.
+        :return: The loaded model.
+        """
+        with self._lock:
+            entry = self._touch(name)
+            if entry is not None:
+                return entry.model
+            if name not in self._loaders:
+                raise KeyError(f"Unknown model: {name}")
+            load_lock = self._load_locks[name]
+
+        # Load outside the registry lock so other models stay available meanwhile
+        with load_lock:
+            with self._lock:
+                entry = self._touch(name)
+                if entry is not None:
+                    return entry.model
+                loader, warmup_fn = self._loaders[name]
+
+            start = time.time()
+            model = loader()
+            if warmup and warmup_fn is not None:
+                warmup_fn(model)
+            size_bytes = estimate_model_bytes(model)
+            MODEL_LOADS.labels(name).inc()
+            MODEL_LOAD_SECONDS.labels(name).observe(time.time() - start)
+            log_message(f"Model '{name}' loaded in {time.time() - start:.2f}s ({size_bytes / 1e6:.1f} MB)")
+
+            with self._lock:
+                self._entries[name] = _Entry(model, size_bytes)
+                self._evict(keep=name)
+            return model
+
+    @contextmanager
+    def use(self, name: str):
+        """
+        Context manager returning a model that is protected from eviction while in use.
+        Blocks while another thread is running a model registered with thread_safe=False.
+        """
+        model = self.get(name)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry.pins += 1
+            inference_lock = self._inference_locks.get(name)
+        try:
+            if inference_lock is None:
+                yield model
+            else:
+                with inference_lock:
+                    yield model
+        finally:
+            with self._lock:
+                if entry is not None:
+                    entry.pins -= 1
+                    self._evict()
+
+    def preload(self, names=None, warmup: bool = True):
+        """
+        Load (and warm up) the given models, logging instead of raising on failure.
+        """
+        for name in names or []:
+            try:
+                self.get(name, warmup=warmup)
+            except Exception as e:
+                log_message(f"Error preloading model '{name}': {str(e)}", "ERROR")
+
+    def unload(self, name: str) -> bool:
+        with self._lock:
+            return self._entries.pop(name, None) is not None
+
+    def loaded_models(self) -> dict:
+        """
+        Return the resident models with their estimated size in bytes.
+        """
+        with self._lock:
+            return {name: entry.size_bytes for name, entry in self._entries.items()}
+
+    def _touch(self, name: str):
+        entry = self._entries.get(name)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(name)
+        return entry
+
+    def _evict(self, keep: str = None):
+        if not self.memory_budget_bytes:
+            return
+        total = sum(entry.size_bytes for entry in self._entries.values())
+        for name in list(self._entries):
+            if total <= self.memory_budget_bytes:
+                break
+            entry = self._entries[name]
+            if name == keep or entry.pins > 0:
+                continue
+            del self._entries[name]
+            total -= entry.size_bytes
+            MODEL_EVICTIONS.labels(name).inc()
+            log_message(f"Model '{name}' evicted to stay within the memory budget")
+
+
+model_registry = ModelRegistry(memory_budget_bytes=MODEL_MEMORY_BUDGET_MB * 1024 * 1024)
+model_registry.register("whisper", _load_whisper, warm_whisper, thread_safe=False)
+model_registry.register("toxicity", _load_toxicity, _warm_text_pipeline)
+model_registry.register("sentiment", _load_sentiment, _warm_text_pipeline)
+model_registry.register("yolo", _load_yolo, _warm_yolo, thread_safe=False)
+
+
+def get_model(name: str):
+    """
+    Shortcut for fetching a resident model from the shared registry.
+    """
+    return model_registry.get(name)
+
+
+def preload_models(background: bool = MODEL_PRELOAD_BACKGROUND):
+    """
+    Load and warm up the models configured in MODEL_PRELOAD. Called at application startup.
+    :param background: Load in a daemon thread instead of blocking startup.
+    """
+    if background:
+        threading.Thread(
+            target=model_registry.preload,
+            args=(MODEL_PRELOAD,),
+            kwargs={"warmup": MODEL_WARMUP},
+            name="model-preload",
+            daemon=True,
+        ).start()
+    else:
+        model_registry.preload(MODEL_PRELOAD, warmup=MODEL_WARMUP)
@@ -0,0 +1,73 @@
+# app/services/onnx_backend.py
+import os
+import threading
+
+from app.config.config import ONNX_QUANTIZE, ONNX_MODEL_DIR, ONNX_THREADS
+from app.utils.logger import log_message
+
+_export_lock = threading.Lock()
+
+
+def _model_dir(model_id: str, quantize: bool) -> str:
+    name = model_id.replace("/", "--")
+    return os.path.join(ONNX_MODEL_DIR, f"{name}-int8" if quantize else name)
+
+
+def export_onnx_model(model_id: str, quantize: bool = ONNX_QUANTIZE) -> str:
+    """
+    Export a Hugging Face sequence-classification checkpoint to ONNX, once per model.
+    :param model_id: Hugging Face model ID.
+    :param quantize: Also write a dynamically int8-quantized copy and return that one.
+    :return: Directory holding the ONNX model, its config and tokenizer.
+    """
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+
+    export_dir = _model_dir(model_id, quantize=False)
+    target_dir = _model_dir(model_id, quantize)
+    with _export_lock:
+        if os.path.exists(os.path.join(target_dir, "config.json")):
+            return target_dir
+
+        if not os.path.exists(os.path.join(export_dir, "config.json")):
+            log_message(f"Exporting {model_id} to ONNX: {export_dir}")
+            model = ORTModelForSequenceClassification.from_pretrained(model_id, export=True)
+            model.save_pretrained(export_dir)
+            AutoTokenizer.from_pretrained(model_id).save_pretrained(export_dir)
+
+        if quantize:
+            from optimum.onnxruntime import ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+            log_message(f"Quantizing {model_id} to int8: {target_dir}")
+            # Dynamic quantization needs no calibration data; avx2 kernels run on any recent x86 CPU
+            quantizer = ORTQuantizer.from_pretrained(export_dir)
+            quantizer.quantize(
+                save_dir=target_dir,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False),
+            )
+            AutoTokenizer.from_pretrained(export_dir).save_pretrained(target_dir)
+    return target_dir
+
+
+def load_onnx_pipeline(task: str, model_id: str, quantize: bool = ONNX_QUANTIZE):
+    """
+    Build a transformers pipeline running on ONNX Runtime (CPU).
+    The pipeline has the same call signature and output as the PyTorch one, so batching,
+    windowing and caching work unchanged.
+    """
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer, pipeline
+
+    model_dir = export_onnx_model(model_id, quantize)
+    session_options = onnxruntime.SessionOptions()
+    if ONNX_THREADS:
+        session_options.intra_op_num_threads = ONNX_THREADS
+    model = ORTModelForSequenceClassification.from_pretrained(
+        model_dir,
+        file_name="model_quantized.onnx" if quantize else "model.onnx",
+        provider="CPUExecutionProvider",
+        session_options=session_options,
+    )
+    return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_dir))
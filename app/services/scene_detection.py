@@ -0,0 +1,61 @@
+# app/services/scene_detection.py
+import cv2
+
+from app.config.config import SCENE_CHANGE_THRESHOLD
+
+
+def frame_signature(frame, size: tuple = (64, 36)):
+    """
+    Cheap signature of a frame: a normalized hue/saturation histogram of a downscaled copy.
+    """
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    histogram = cv2.calcHist([hsv], [0, 1], None, [16, 16], [0, 180, 0, 256])
+    cv2.normalize(histogram, histogram, alpha=1.0, norm_type=cv2.NORM_L1)
+    return histogram
+
+
+def signature_distance(first, second) -> float:
+    """
+    Bhattacharyya distance between two signatures: 0 for identical frames, 1 for disjoint ones.
+    """
+    return float(cv2.compareHist(first, second, cv2.HISTCMP_BHATTACHARYYA))
+
+
+class SceneChangeDetector:
+    """
+    Tracks scene boundaries over a stream of sampled frames.
+    Each frame is compared with the first frame of the current scene, so slow drift
+    eventually opens a new scene as well.
+    """
+
+    def __init__(self, threshold: float = SCENE_CHANGE_THRESHOLD):
+        self.threshold = threshold
+        self._reference = None
+        self._last_timestamp = 0.0
+        self.scenes = []
+
+    def update(self, frame, timestamp: float) -> bool:
+        """
+        Feed the next sampled frame.
+        :return: True if the frame starts a new scene.
+        """
+        signature = frame_signature(frame)
+        self._last_timestamp = timestamp
+        if self._reference is not None and signature_distance(self._reference, signature) <= self.threshold:
+            return False
+
+        if self.scenes:
+            self.scenes[-1]["end"] = round(timestamp, 3)
+        self.scenes.append({"scene": len(self.scenes) + 1, "start": round(timestamp, 3), "end": None})
+        self._reference = signature
+        return True
+
+    def finish(self, end_time: float = None) -> list:
+        """
+        Close the last scene and return all scene boundaries.
+        :param end_time: End of the video in seconds; defaults to the last sampled timestamp.
+        """
+        if self.scenes and self.scenes[-1]["end"] is None:
+            self.scenes[-1]["end"] = round(end_time if end_time is not None else self._last_timestamp, 3)
+        return self.scenes
@@ -1,9 +1,14 @@
-from transformers import pipeline
 import warnings
+from app.config.config import CLASSIFICATION_BATCH_SIZE, CLASSIFICATION_WINDOW_TOKENS, CLASSIFICATION_WINDOW_OVERLAP
+from app.services.classification_cache import cached_classify
+from app.services.model_registry import model_registry, classifier_id, SENTIMENT_MODEL_ID
+from app.utils.batching import run_pipeline_in_batches, sliding_windows
 warnings.filterwarnings("ignore", category=UserWarning, module="torch")
 
-# Load the sentiment-analysis pipeline
-sentiment_analyzer = pipeline("sentiment-analysis", model="distilbert-base-uncased")
+def _classify_sentiment(texts: list, batch_size: int) -> list:
+    with model_registry.use("sentiment") as sentiment_analyzer:
+        return run_pipeline_in_batches(sentiment_analyzer, texts, batch_size)
+
 
 def analyze_sentiment(text: str) -> dict:
     """
@@ -12,7 +17,57 @@ def analyze_sentiment(text: str) -> dict:
     :return: Sentiment score and label.
     """
     try:
-        result = sentiment_analyzer(text)
-        return result[0]  # Return the first result (the sentiment analysis output)
+        return cached_classify(classifier_id(SENTIMENT_MODEL_ID), [text], lambda texts: _classify_sentiment(texts, 1))[0]
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def analyze_sentiment_batch(texts: list, batch_size: int = CLASSIFICATION_BATCH_SIZE) -> list:
+    """
+    Analyzes sentiment of many texts with batched forward passes.
+    Texts seen before (by this or another worker) are served from the classification cache.
+    :param texts: Input texts to analyze.
+    :param batch_size: Number of texts per forward pass.
+    :return: One sentiment score and label per text.
+    """
+    try:
+        return cached_classify(classifier_id(SENTIMENT_MODEL_ID), texts, lambda pending: _classify_sentiment(pending, batch_size))
+    except Exception as e:
+        return [{"error": str(e)} for _ in texts]
+
+
+def analyze_sentiment_windowed(text: str, window_tokens: int = CLASSIFICATION_WINDOW_TOKENS,
+                               overlap: int = CLASSIFICATION_WINDOW_OVERLAP,
+                               batch_size: int = CLASSIFICATION_BATCH_SIZE) -> dict:
+    """
+    Analyzes sentiment of a text longer than the model limit, such as a full transcript.
+    Overlapping windows are scored in batches and combined weighted by the tokens each one adds.
+    :param text: Input text to analyze.
+    :param window_tokens: Maximum tokens per window.
+    :param overlap: Tokens shared by consecutive windows.
+    :param batch_size: Number of windows per forward pass.
+    :return: Overall sentiment label and score, plus the result of each window with its character offsets.
+    """
+    try:
+        with model_registry.use("sentiment") as sentiment_analyzer:
+            windows = sliding_windows(sentiment_analyzer.tokenizer, text, window_tokens, overlap)
+        results = analyze_sentiment_batch([text[start:end] for start, end, _ in windows], batch_size)
+
+        scored = []
+        label_weights = {}
+        total_weight = 0
+        for (start, end, weight), result in zip(windows, results):
+            if "error" in result:
+                continue
+            # A window holding no new tokens still counts a little, so single-window texts keep their score
+            weight = max(weight, 1)
+            label_weights[result["label"]] = label_weights.get(result["label"], 0.0) + weight * result["score"]
+            total_weight += weight
+            scored.append({"start": start, "end": end, "label": result["label"], "score": result["score"]})
+        if not scored:
+            return results[0] if results else {"error": "Nothing to analyze"}
+
+        label = max(label_weights, key=label_weights.get)
+        return {"label": label, "score": label_weights[label] / total_weight, "windows": scored}
     except Exception as e:
         return {"error": str(e)}
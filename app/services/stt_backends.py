@@ -0,0 +1,159 @@
+# app/services/stt_backends.py
+import importlib.util
+
+from app.config.config import (
+    WHISPER_MODEL_SIZE, STT_BACKEND, STT_LATENCY_SLO_SECONDS, STT_MODEL_SIZES,
+    FASTER_WHISPER_COMPUTE_TYPE,
+)
+from app.services.model_registry import model_registry, warm_whisper
+from app.utils.logger import log_message
+
+# Rough CPU processing seconds per second of audio, used to predict transcription time
+SPEED_FACTORS = {
+    "whisper": {"tiny": 0.1, "base": 0.2, "small": 0.6, "medium": 1.8, "large": 4.0, "large-v3": 4.0},
+    "faster-whisper": {"tiny": 0.03, "base": 0.06, "small": 0.15, "medium": 0.45, "large": 1.0, "large-v3": 1.0},
+}
+
+
+class WhisperBackend:
+    """
+    openai-whisper running in FP32 through PyTorch.
+    """
+    name = "whisper"
+
+    def model_name(self, model_size: str) -> str:
+        # The default size keeps the name preloaded at startup
+        return "whisper" if model_size == WHISPER_MODEL_SIZE else f"whisper-{model_size}"
+
+    def register(self, model_size: str) -> str:
+        name = self.model_name(model_size)
+        # The decoder installs kv-cache hooks per call, so one transcription at a time per model
+        model_registry.ensure_registered(name, self._load(model_size), warm_whisper, thread_safe=False)
+        return name
+
+    def _load(self, model_size: str):
+        def loader():
+            import whisper
+            return whisper.load_model(model_size)
+        return loader
+
+    def set_threads(self, threads: int):
+        try:
+            import torch
+        except ImportError:
+            return
+        torch.set_num_threads(threads)
+
+    def transcribe(self, samples, model_size: str = WHISPER_MODEL_SIZE, word_timestamps: bool = False) -> dict:
+        """
+        Transcribe 16 kHz mono float32 samples.
+        :return: Dictionary with the full "text" and its "segments" (start, end, text).
+        """
+        name = self.register(model_size)
+        with model_registry.use(name) as model:
+            result = model.transcribe(samples, word_timestamps=word_timestamps)
+        return {
+            "text": result.get("text", ""),
+            "segments": [
+                {"start": segment['start'], "end": segment['end'], "text": segment['text']}
+                for segment in result.get('segments', [])
+            ],
+        }
+
+
+class FasterWhisperBackend:
+    """
+    faster-whisper (CTranslate2) with int8 weights, several times faster than FP32 Whisper on CPU.
+    """
+    name = "faster-whisper"
+
+    def __init__(self, compute_type: str = FASTER_WHISPER_COMPUTE_TYPE):
+        self.compute_type = compute_type
+        self.cpu_threads = 0
+
+    def model_name(self, model_size: str) -> str:
+        return f"faster-whisper-{model_size}"
+
+    def register(self, model_size: str) -> str:
+        name = self.model_name(model_size)
+        model_registry.ensure_registered(name, self._load(model_size))
+        return name
+
+    def _load(self, model_size: str):
+        def loader():
+            from faster_whisper import WhisperModel
+            return WhisperModel(model_size, device="cpu", compute_type=self.compute_type, cpu_threads=self.cpu_threads)
+        return loader
+
+    def set_threads(self, threads: int):
+        self.cpu_threads = threads
+
+    def transcribe(self, samples, model_size: str = WHISPER_MODEL_SIZE, word_timestamps: bool = False) -> dict:
+        name = self.register(model_size)
+        with model_registry.use(name) as model:
+            segments, _ = model.transcribe(samples, word_timestamps=word_timestamps)
+            # Segments are decoded lazily, so consume them while the model is pinned
+            segments = [{"start": segment.start, "end": segment.end, "text": segment.text} for segment in segments]
+        return {"text": "".join(segment["text"] for segment in segments), "segments": segments}
+
+
+STT_BACKENDS = {
+    "whisper": WhisperBackend(),
+    "faster-whisper": FasterWhisperBackend(),
+}
+# Make the default size of every backend known to the registry, so MODEL_PRELOAD can name it
+for _backend in STT_BACKENDS.values():
+    _backend.register(WHISPER_MODEL_SIZE)
+
+
+def get_stt_backend(name: str):
+    if name not in STT_BACKENDS:
+        raise ValueError(f"Unknown speech-to-text backend: {name}. Supported: {', '.join(STT_BACKENDS)}")
+    return STT_BACKENDS[name]
+
+
+def available_backends() -> list:
+    """
+    Backends whose engine is installed, fastest first.
+    """
+    backends = []
+    if importlib.util.find_spec("faster_whisper") is not None:
+        backends.append("faster-whisper")
+    if importlib.util.find_spec("whisper") is not None:
+        backends.append("whisper")
+    return backends
+
+
+def estimate_seconds(backend: str, model_size: str, duration_seconds: float, workers: int = 1) -> float:
+    factor = SPEED_FACTORS.get(backend, {}).get(model_size)
+    if factor is None:
+        return float("inf")
+    return factor * duration_seconds / max(1, workers)
+
+
+def choose_stt(duration_seconds: float, slo_seconds: float = STT_LATENCY_SLO_SECONDS, backend: str = STT_BACKEND,
+               model_sizes: list = None, workers: int = 1) -> tuple:
+    """
+    Pick the backend and model size for an audio of the given length.
+    The best model predicted to finish within slo_seconds wins; when none does, the fastest is used.
+    :param duration_seconds: Seconds of audio to transcribe (after voice activity detection).
+    :param slo_seconds: Latency target in seconds; 0 disables the policy and uses WHISPER_MODEL_SIZE.
+    :param backend: "whisper", "faster-whisper" or "auto".
+    :param model_sizes: Candidate sizes, best quality first; defaults to STT_MODEL_SIZES.
+    :param workers: Processes sharing the transcription (chunked audio).
+    :return: Tuple of (backend name, model size).
+    """
+    if backend == "auto":
+        backends = available_backends() or ["whisper"]
+    else:
+        backends = [get_stt_backend(backend).name]
+    if slo_seconds <= 0:
+        return backends[0], WHISPER_MODEL_SIZE
+
+    candidates = [(name, size) for size in (model_sizes or STT_MODEL_SIZES) for name in backends]
+    for name, size in candidates:
+        if estimate_seconds(name, size, duration_seconds, workers) <= slo_seconds:
+            return name, size
+    name, size = min(candidates, key=lambda candidate: estimate_seconds(*candidate, duration_seconds, workers))
+    log_message(f"No speech-to-text model meets the {slo_seconds:.0f}s target for {duration_seconds:.0f}s of audio, using {name} {size}")
+    return name, size
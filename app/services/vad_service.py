@@ -0,0 +1,159 @@
+# app/services/vad_service.py
+import numpy as np
+
+from app.config.config import (
+    VAD_BACKEND, VAD_AGGRESSIVENESS, VAD_ENERGY_MARGIN_DB, VAD_ENERGY_FLOOR_DB, VAD_MODULATION_DB,
+    VAD_MIN_SPEECH_MS, VAD_MIN_SILENCE_MS, VAD_PADDING_MS,
+)
+from app.utils.audio_utils import SAMPLE_RATE
+from app.utils.logger import log_message
+
+# WebRTC VAD only accepts 10, 20 or 30 ms frames
+_FRAME_MS = 30
+# Span over which the syllable modulation of the frame energy is measured
+_MODULATION_WINDOW_MS = 500
+# Silence inserted between speech regions so Whisper does not merge words across a cut
+_GAP_SECONDS = 0.2
+
+
+def _local_deviation(values: np.ndarray, window: int) -> np.ndarray:
+    # Standard deviation over a centred sliding window, repeating the edge values
+    padded = np.pad(values, window // 2, mode="edge")
+    kernel = np.ones(window) / window
+    mean = np.convolve(padded, kernel, mode="valid")
+    mean_square = np.convolve(np.square(padded), kernel, mode="valid")
+    return np.sqrt(np.maximum(mean_square - np.square(mean), 0.0))
+
+
+def _energy_speech_frames(samples: np.ndarray, frame: int) -> np.ndarray:
+    frames = len(samples) // frame
+    energy = np.square(samples[:frames * frame].reshape(frames, frame)).mean(axis=1)
+    energy_db = 10 * np.log10(energy + 1e-10)
+    # The quietest frames approximate the noise floor of this recording
+    noise_floor, loud = np.percentile(energy_db, [10, 90])
+    if loud - noise_floor < VAD_ENERGY_MARGIN_DB:
+        # No frames stand out from the rest: continuous speech, speech over music, compressed
+        # audio or just music. Speech still rises and falls with its syllables, while held
+        # tones and chords stay level, so only frames with that modulation are kept
+        window = (_MODULATION_WINDOW_MS // _FRAME_MS) | 1  # Odd, so the window is centred on the frame
+        return (energy_db > VAD_ENERGY_FLOOR_DB) & (_local_deviation(energy_db, window) > VAD_MODULATION_DB)
+    threshold = max(noise_floor + VAD_ENERGY_MARGIN_DB, VAD_ENERGY_FLOOR_DB)
+    return energy_db > threshold
+
+
+def _webrtc_speech_frames(samples: np.ndarray, frame: int, sample_rate: int) -> np.ndarray:
+    import webrtcvad
+    vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    frames = len(pcm) // frame
+    return np.array([vad.is_speech(pcm[i * frame:(i + 1) * frame].tobytes(), sample_rate) for i in range(frames)], dtype=bool)
+
+
+def detect_speech_regions(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, backend: str = VAD_BACKEND) -> list:
+    """
+    Find the speech regions of an audio buffer.
+    :param samples: Mono float32 samples.
+    :param sample_rate: Sample rate in Hz.
+    :param backend: "energy" or "webrtc"; falls back to "energy" when webrtcvad is not installed.
+    :return: List of (start_sample, end_sample) tuples.
+    """
+    frame = int(sample_rate * _FRAME_MS / 1000)
+    if len(samples) < frame:
+        return []
+
+    speech = None
+    if backend == "webrtc":
+        try:
+            speech = _webrtc_speech_frames(samples, frame, sample_rate)
+        except ImportError:
+            log_message("webrtcvad is not installed, falling back to the energy VAD", "ERROR")
+    if speech is None:
+        speech = _energy_speech_frames(samples, frame)
+
+    # Turn per-frame decisions into runs of speech frames
+    regions = []
+    start = None
+    for i, is_speech in enumerate(speech):
+        if is_speech and start is None:
+            start = i
+        elif not is_speech and start is not None:
+            regions.append([start, i])
+            start = None
+    if start is not None:
+        regions.append([start, len(speech)])
+
+    # Bridge short pauses, drop blips and pad what is left
+    min_silence = VAD_MIN_SILENCE_MS // _FRAME_MS
+    min_speech = VAD_MIN_SPEECH_MS // _FRAME_MS
+    padding = VAD_PADDING_MS // _FRAME_MS
+    merged = []
+    for region in regions:
+        if merged and region[0] - merged[-1][1] < min_silence:
+            merged[-1][1] = region[1]
+        else:
+            merged.append(region)
+
+    result = []
+    for start, end in merged:
+        if end - start < min_speech:
+            continue
+        start = max(0, start - padding) * frame
+        end = min(len(samples), (end + padding) * frame)
+        if result and start <= result[-1][1]:
+            result[-1] = (result[-1][0], end)
+        else:
+            result.append((start, end))
+    return result
+
+
+def compact_speech(samples: np.ndarray, regions: list, sample_rate: int = SAMPLE_RATE):
+    """
+    Concatenate the speech regions into one buffer, separated by short silences.
+    :return: Tuple of the compacted samples and the mapping used by remap_segments.
+    """
+    gap = np.zeros(int(_GAP_SECONDS * sample_rate), dtype=np.float32)
+    pieces = []
+    mapping = []
+    position = 0
+    for start, end in regions:
+        if pieces:
+            pieces.append(gap)
+            position += len(gap)
+        pieces.append(samples[start:end])
+        mapping.append((position / sample_rate, start / sample_rate, (end - start) / sample_rate))
+        position += end - start
+    compacted = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    return compacted, mapping
+
+
+def _to_original_time(t: float, mapping: list) -> float:
+    # Times inside an inserted gap snap to the end of the preceding region
+    for compact_start, original_start, length in reversed(mapping):
+        if t >= compact_start:
+            return original_start + min(t - compact_start, length)
+    return mapping[0][1] if mapping else t
+
+
+def remap_segments(segments: list, mapping: list) -> list:
+    """
+    Move segment timestamps from the compacted timeline back onto the original audio.
+    """
+    return [
+        {**segment, "start": _to_original_time(segment["start"], mapping), "end": _to_original_time(segment["end"], mapping)}
+        for segment in segments
+    ]
+
+
+def speech_coverage(regions: list, total_samples: int, sample_rate: int = SAMPLE_RATE) -> dict:
+    """
+    Summarize how much of the audio is speech.
+    """
+    speech_samples = sum(end - start for start, end in regions)
+    total_seconds = total_samples / sample_rate
+    speech_seconds = speech_samples / sample_rate
+    return {
+        "total_seconds": round(total_seconds, 2),
+        "speech_seconds": round(speech_seconds, 2),
+        "speech_ratio": round(speech_seconds / total_seconds, 4) if total_seconds else 0.0,
+        "speech_regions": len(regions),
+    }
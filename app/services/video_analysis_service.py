@@ -1,24 +1,33 @@
 import os
+import shutil
 import subprocess
 import shlex
-import ffmpeg
 import random
-import cv2
 from fastapi import HTTPException
-from app.services.sentiment_analysis_service import analyze_sentiment
-from app.services.harmful_content_service import analyze_harmful_content
+from app.services.sentiment_analysis_service import analyze_sentiment_batch, analyze_sentiment_windowed
+from app.services.harmful_content_service import analyze_harmful_content_batch, analyze_harmful_content_windowed
+from app.services.audio_analysis_service import transcribe_audio
+from app.config.config import CLASSIFICATION_BATCH_SIZE, ARCHIVE_AUDIO_MP3
+from app.config.config import FRAME_SAMPLING_MODE, FRAME_SAMPLE_FPS, FRAME_STRIDE
+from app.config.config import SCENE_GATING
+from app.config.config import DETECTION_BATCH_SIZE, DETECTION_QUEUE_DEPTH, SAVE_ANNOTATED_FRAMES
+from app.utils.audio_utils import decode_audio, SAMPLE_RATE
+from app.utils.media_probe import probe_media
+from app.services.export_service import export_video_report
 
 from app.utils.logger import log_message
+from app.utils.metrics import stage_timer
 import datetime
 from app.models.analysis_model import VideoAnalysisResponse
 
 from app.utils.mongo_utils import MongoDB
 import time
-from ultralytics import YOLO
+from app.services.model_registry import model_registry
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-UPLOAD_FOLDER = os.path.join(BASE_DIR, "static", "uploads")
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)  # Ensure the base upload folder exists
+UPLOAD_FOLDER = os.path.join(BASE_DIR, "static", "uploads")  # Created on the first upload
+
+_video_indexes_ready = False
 
 
 def generate_metadata_id():
@@ -46,95 +55,358 @@ def create_metadata_folder(metadata_id):
     return folder_path
 
 
-def video_analysis(video_file_path: str) -> dict:
+def video_analysis(video_file_path: str, metadata_id: str = None, content_hash: str = None, keep_audio: bool = False,
+                   timings: dict = None) -> dict:
+    """
+    Extract audio and metadata for an uploaded video and register it in MongoDB.
+    :param video_file_path: Path to the uploaded video.
+    :param metadata_id: ID of the metadata folder the upload was streamed into; generated if omitted.
+    :param content_hash: SHA-256 of the upload, stored so repeat uploads can be detected.
+    :param keep_audio: Decode the audio to in-memory PCM and return it under "audio_samples".
+    :param timings: Optional dictionary receiving the duration of each stage in seconds.
+    """
+    if timings is None:
+        timings = {}
+
     if not os.path.exists(video_file_path):
         log_message(f"Error: Video file {video_file_path} does not exist.", "ERROR")
         raise HTTPException(status_code=400, detail="Video file not found.")
 
-    # Generate metadata ID and create the storage folder
-    metadata_id = generate_metadata_id()
+    # Generate metadata ID and create the storage folder when the caller did not
+    if metadata_id is None:
+        metadata_id = generate_metadata_id()
     metadata_folder = create_metadata_folder(metadata_id)
 
-    # Rename and move video file to the metadata folder
+    # Uploads are streamed straight into the metadata folder; only move files coming from elsewhere
     video_file_name = f"{metadata_id}.mp4"
     renamed_video_path = os.path.join(metadata_folder, video_file_name)
-    os.rename(video_file_path, renamed_video_path)
+    if os.path.abspath(video_file_path) != os.path.abspath(renamed_video_path):
+        os.replace(video_file_path, renamed_video_path)
+
+    # Probe the container once; every later stage reuses this result
+    with stage_timer("probe", timings):
+        media_info = probe_video(renamed_video_path)
+    if not media_info.get("video"):
+        # Reject audio-only and broken uploads before spending an ffmpeg pass on their audio
+        log_message(f"Error: No video stream found in {renamed_video_path}", "ERROR")
+        raise HTTPException(status_code=400, detail="Uploaded file has no video stream.")
 
     # Extract audio and save it in the same folder
     audio_file_name = f"{metadata_id}.mp3"
     audio_file_path = os.path.join(metadata_folder, audio_file_name)
-    audio_file_url = extract_audio_from_video(renamed_video_path, audio_file_path)
+    audio_samples = None
+    if not media_info["has_audio"]:
+        # Nothing to extract or transcribe
+        log_message(f"No audio stream in {renamed_video_path}, skipping audio extraction")
+        audio_file_url = ""
+    elif keep_audio:
+        # One ffmpeg pass yields the samples for Whisper and, optionally, the archived MP3
+        archive_path = audio_file_path if ARCHIVE_AUDIO_MP3 else None
+        with stage_timer("extract_audio", timings):
+            audio_samples = extract_audio_pcm(renamed_video_path, archive_path)
+        audio_file_url = archive_path or ""
+    else:
+        with stage_timer("extract_audio", timings):
+            audio_file_url = extract_audio_from_video(renamed_video_path, audio_file_path)
 
     # Process video metadata
-    video_info = process_video(renamed_video_path, metadata_folder)
+    with stage_timer("process_video", timings):
+        video_info = process_video(renamed_video_path, metadata_folder, media_info)
 
-    # Save an example Excel file in the same folder (optional)
-    excel_file_name = f"{metadata_id}.xlsx"
-    excel_file_path = os.path.join(metadata_folder, excel_file_name)
-    save_metadata_to_excel(metadata_id, video_info, excel_file_path)
+    # Save the metadata report in the configured formats (Excel only on request)
+    with stage_timer("export_report", timings):
+        report_files = export_video_report(metadata_id, video_info, metadata_folder)
 
     # Insert metadata into MongoDB
     metadata = {
-        "metadataId":metadata_id,
-        "video_file_path": video_file_path,
+        "video_file_path": renamed_video_path,
         "audio_file_url": audio_file_url,
         "video_info": video_info,
-        "status": "pending",
-        "uploadTimestamp": datetime.datetime.now().isoformat(),
+        "media_info": media_info,
+        "report_files": report_files,
+        "stage_timings": timings,
         "processedTimestamp":""
     }
+    if content_hash:
+        metadata["contentHash"] = content_hash
 
     try:
         mongo_db = MongoDB()  # Create an instance of MongoDB
-        inserted_id = mongo_db.insert_document('videoMetadata', metadata)  # Insert into MongoDB
-        log_message(f"Video metadata inserted with ID: {inserted_id}")
+        # Only set the metadata fields, so the status and progress of a running job are kept
+        with stage_timer("mongo_insert", timings):
+            inserted_id = mongo_db.upsert_fields(
+                'videoMetadata',
+                {"metadataId": metadata_id},
+                metadata,
+                insert_fields={"status": "pending", "uploadTimestamp": datetime.datetime.now().isoformat()},
+            )
+        log_message(f"Video metadata inserted with ID: {inserted_id or metadata_id}")
     except Exception as e:
         log_message(f"Error inserting metadata into MongoDB: {str(e)}", "ERROR")
         raise HTTPException(status_code=500, detail="Failed to insert metadata into MongoDB.")
 
     # Return the response
-    return {
+    response = {
         "metadata_id": metadata_id,
         "folder_name": metadata_folder,
         "video_info": video_info,
+        "media_info": media_info,
         "audio_file_url": audio_file_url,
+        "report_files": report_files,
         "status": "success",
         "message": "Video analysis completed successfully",
     }
+    if keep_audio:
+        response["audio_samples"] = audio_samples
+    return response
 
 
-def process_video(video_file_path: str, folder_name: str) -> dict:
+def run_video_pipeline(video_file_path: str, metadata_id: str, content_hash: str = None, on_stage=None) -> dict:
     """
-    Extract video metadata and return it as a dictionary.
+    Run the full analysis pipeline for an uploaded video: extraction, transcription,
+    sentiment and harmful content analysis. Results are stored on the videoMetadata document.
+    :param video_file_path: Path to the uploaded video inside its metadata folder.
+    :param metadata_id: Metadata ID of the upload.
+    :param content_hash: SHA-256 of the upload.
+    :param on_stage: Optional callback receiving (stage, progress) before each stage.
+    :return: Dictionary with the video summary and analysis results.
     """
-    cap = cv2.VideoCapture(video_file_path)
-    if not cap.isOpened():
-        log_message(f"Error: Unable to open video file {video_file_path}", "ERROR")
-        raise HTTPException(status_code=500, detail="Video processing failed.")
+    def report(stage, progress):
+        if on_stage is not None:
+            on_stage(stage, progress)
+
+    # Duration of every stage, stored on the videoMetadata document with the results
+    timings = {}
+
+    # Step 1: Extract audio and video metadata
+    report("extracting", 0.1)
+    analysis_summary = video_analysis(video_file_path, metadata_id, content_hash, keep_audio=True, timings=timings)
+    audio_file_url = analysis_summary["audio_file_url"]
+    audio_samples = analysis_summary.pop("audio_samples")
+
+    if audio_samples is None:
+        # Videos without an audio stream have nothing to transcribe or classify
+        transcript, sentiment_result, harmful_content_result = "", None, None
+    else:
+        # Step 2: Perform audio transcription on the speech regions of the in-memory samples
+        report("transcribing", 0.4)
+        speech_stats = {}
+        try:
+            with stage_timer("transcription", timings):
+                transcript = transcribe_audio(audio_samples, speech_stats)
+        except RuntimeError as e:
+            # Fail the video instead of caching an error message as its transcript
+            raise HTTPException(status_code=500, detail=str(e)) from e
+        save_speech_coverage(metadata_id, speech_stats)
+        if not transcript and speech_stats.get("speech_seconds", 1):
+            raise HTTPException(status_code=500, detail="Audio transcription failed.")
+
+        if transcript:
+            # Step 3: Perform sentiment analysis on the whole transcript, window by window
+            report("sentiment_analysis", 0.7)
+            with stage_timer("sentiment_analysis", timings):
+                sentiment_result = analyze_sentiment_windowed(transcript)
+
+            # Step 4: Perform harmful content analysis on the whole transcript, window by window
+            report("harmful_content_analysis", 0.85)
+            with stage_timer("harmful_content_analysis", timings):
+                harmful_content_result = analyze_harmful_content_windowed(transcript)
+        else:
+            # No speech at all: nothing for the text classifiers to flag
+            sentiment_result, harmful_content_result = None, None
+
+    # Step 5: Cache the results for repeat uploads and polling clients
+    results = {
+        "transcript": transcript,
+        "sentiment_analysis": sentiment_result,
+        "harmful_content_analysis": harmful_content_result,
+    }
+    with stage_timer("mongo_save_results"):
+        save_analysis_results(metadata_id, results, timings)
+
+    return {
+        "metadata_id": analysis_summary["metadata_id"],
+        "video_info": analysis_summary["video_info"],
+        "audio_file_url": audio_file_url,
+        "status": analysis_summary["status"],
+        "message": analysis_summary["message"],
+        **results,
+        "report_files": analysis_summary["report_files"],
+        "excel_file_path": analysis_summary["report_files"].get("excel"),
+        "stage_timings": timings,
+    }
+
+
+def ensure_video_indexes(mongo_db: MongoDB):
+    """
+    Create the unique content hash index on videoMetadata once per process.
+    Documents created before hashing was introduced have no hash and are excluded from the index.
+    """
+    global _video_indexes_ready
+    if _video_indexes_ready:
+        return
+    mongo_db.create_index(
+        'videoMetadata',
+        "contentHash",
+        unique=True,
+        partialFilterExpression={"contentHash": {"$type": "string"}},
+    )
+    _video_indexes_ready = True
+
+
+def find_video_by_hash(content_hash: str):
+    """
+    Look up a previously uploaded video by the SHA-256 of its content.
+    :param content_hash: SHA-256 hex digest of the upload.
+    :return: The videoMetadata document, or None for a new upload.
+    """
+    try:
+        mongo_db = MongoDB()
+        ensure_video_indexes(mongo_db)
+        return mongo_db.find_document('videoMetadata', {"contentHash": content_hash})
+    except Exception as e:
+        # A failed lookup only costs a reprocess, never the upload itself
+        log_message(f"Error looking up video by content hash: {str(e)}", "ERROR")
+        return None
+
+
+def reuse_metadata_folder(video_file_path: str, metadata_id: str, existing_metadata_id: str) -> str:
+    """
+    Move a repeat upload into the folder of the existing metadata ID and drop the new folder.
+    :return: The path of the video inside the existing metadata folder.
+    """
+    existing_folder = create_metadata_folder(existing_metadata_id)
+    existing_video_path = os.path.join(existing_folder, f"{existing_metadata_id}.mp4")
+    os.replace(video_file_path, existing_video_path)
+    discard_metadata_folder(metadata_id)
+    return existing_video_path
+
+
+def discard_metadata_folder(metadata_id: str):
+    """
+    Remove the folder created for an upload that turned out to be a duplicate.
+    """
+    shutil.rmtree(os.path.join(UPLOAD_FOLDER, metadata_id), ignore_errors=True)
+
+
+def cached_video_summary(document: dict) -> dict:
+    """
+    Build the video_analysis response from an existing videoMetadata document.
+    """
+    metadata_id = document["metadataId"]
+    return {
+        "metadata_id": metadata_id,
+        "folder_name": os.path.join(UPLOAD_FOLDER, metadata_id),
+        "video_info": document.get("video_info", {}),
+        "audio_file_url": document.get("audio_file_url", ""),
+        "status": "success",
+        "message": "Video already analyzed, returning cached results",
+    }
+
+
+def save_speech_coverage(metadata_id: str, speech_stats: dict):
+    """
+    Store the voice activity statistics of the audio on the videoMetadata document.
+    """
+    if not speech_stats:
+        return
+    try:
+        mongo_db = MongoDB()
+        mongo_db.update_document('videoMetadata', {"metadataId": metadata_id}, {"speech_coverage": speech_stats})
+    except Exception as e:
+        log_message(f"Error saving speech coverage to MongoDB: {str(e)}", "ERROR")
 
-    # Extract metadata
-    width = int(    (cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    duration_seconds = frame_count / fps if fps else 0
-    duration_minutes = round(duration_seconds / 60, 2) if duration_seconds else 0
-    fps = round(fps, 2)  # Round FPS to 2 decimal places
 
-    # Release the video capture object
-    cap.release()
+def save_transcript_segments(metadata_id: str, transcript_segments: list, detected_issues: list):
+    """
+    Store per-segment transcript results and detected issues with bulk writes, replacing earlier runs.
+    """
+    try:
+        mongo_db = MongoDB()
+        query = {"metadataId": metadata_id}
+        mongo_db.delete_documents('transcriptSegments', query)
+        mongo_db.delete_documents('detectedIssues', query)
+        mongo_db.bulk_insert('transcriptSegments', [
+            {"metadataId": metadata_id, "index": index, "start": segment['start'], "end": segment['end'], "text": segment['text']}
+            for index, segment in enumerate(transcript_segments)
+        ])
+        mongo_db.bulk_insert('detectedIssues', [
+            {"metadataId": metadata_id, "timestamp": issue['timestamp'], "problem": issue['problem']}
+            for issue in detected_issues
+        ])
+    except Exception as e:
+        log_message(f"Error saving transcript segments to MongoDB: {str(e)}", "ERROR")
+
+
+def save_analysis_results(metadata_id: str, results: dict, stage_timings: dict = None):
+    """
+    Store the analysis results (and the stage durations, if given) on the videoMetadata document and mark it processed.
+    """
+    try:
+        mongo_db = MongoDB()
+        fields = {
+            "results": results,
+            "status": "processed",
+            "stage": "completed",
+            "progress": 1.0,
+            "processedTimestamp": datetime.datetime.now().isoformat(),
+        }
+        if stage_timings is not None:
+            fields["stage_timings"] = stage_timings
+        mongo_db.update_document('videoMetadata', {"metadataId": metadata_id}, fields)
+    except Exception as e:
+        log_message(f"Error saving analysis results to MongoDB: {str(e)}", "ERROR")
+
+
+def process_video(video_file_path: str, folder_name: str, media_info: dict = None) -> dict:
+    """
+    Extract video metadata and return it as a dictionary.
+    :param video_file_path: Path to the video file.
+    :param folder_name: Metadata folder of the video.
+    :param media_info: Result of probe_media, probed here if not provided.
+    """
+    if media_info is None:
+        media_info = probe_video(video_file_path)
+
+    video_stream = media_info.get("video")
+    if not video_stream:
+        log_message(f"Error: No video stream found in {video_file_path}", "ERROR")
+        raise HTTPException(status_code=400, detail="Uploaded file has no video stream.")
+
+    # Prefer the container duration, which is accurate even when the frame count is estimated
+    fps = video_stream["fps"]
+    duration_seconds = media_info.get("duration") or video_stream.get("duration") or 0
+    frame_count = video_stream["frame_count"]
+    duration_minutes = round(duration_seconds / 60, 2) if duration_seconds else 0
 
     video_info = {
-        "width": width,
-        "height": height,
+        "width": video_stream["width"],
+        "height": video_stream["height"],
         "frame_count": frame_count,
-        "fps": fps,
+        "fps": round(fps, 2),  # Round FPS to 2 decimal places
         "duration_minutes": duration_minutes,  # Changed to duration in minutes
+        "duration_seconds": round(duration_seconds, 3),
+        "video_codec": video_stream.get("codec"),
+        "bit_rate": media_info.get("bit_rate"),
+        "container": media_info.get("container"),
+        "has_audio": media_info.get("has_audio", False),
+        "audio_codec": (media_info.get("audio") or {}).get("codec"),
     }
     log_message(f"Video processed successfully: {video_info}")
     return video_info
 
 
+def probe_video(video_file_path: str) -> dict:
+    """
+    Probe the video once with ffprobe; the result is reused by the later stages.
+    """
+    try:
+        return probe_media(video_file_path)
+    except (subprocess.CalledProcessError, ValueError) as e:
+        log_message(f"Error: Unable to probe video file {video_file_path}: {str(e)}", "ERROR")
+        raise HTTPException(status_code=500, detail="Video processing failed.")
+
+
 def extract_audio_from_video(video_file_path: str, audio_file_path: str) -> str:
     """
     Extract audio from the video file and save it as an MP3.
@@ -148,88 +420,104 @@ def extract_audio_from_video(video_file_path: str, audio_file_path: str) -> str:
         log_message(f"Error extracting audio from video: {str(e)}", "ERROR")
         raise HTTPException(status_code=500, detail="Failed to extract audio from video.")
 
-def detect_objects_and_scenes(video_path: str, output_dir: str) -> dict:
+def extract_audio_pcm(video_file_path: str, archive_path: str = None):
+    """
+    Decode the audio of the video to 16 kHz mono float32 samples, optionally archiving an MP3
+    in the same ffmpeg invocation.
+    """
+    try:
+        audio_samples = decode_audio(video_file_path, archive_path)
+        log_message(f"Audio decoded successfully: {len(audio_samples) / SAMPLE_RATE:.1f}s")
+        return audio_samples
+    except subprocess.CalledProcessError as e:
+        log_message(f"Error extracting audio from video: {str(e)}", "ERROR")
+        raise HTTPException(status_code=500, detail="Failed to extract audio from video.")
+
+def detect_objects_and_scenes(video_path: str, output_dir: str, sampling_mode: str = FRAME_SAMPLING_MODE,
+                              sample_fps: float = FRAME_SAMPLE_FPS, frame_stride: int = FRAME_STRIDE,
+                              batch_size: int = DETECTION_BATCH_SIZE, queue_depth: int = DETECTION_QUEUE_DEPTH,
+                              scene_gating: bool = SCENE_GATING) -> dict:
     """
     Detect objects and scenes in a video using YOLOv8.
+    Only sampled frames are converted and passed to YOLO; sparse "fps" sampling also seeks past the others.
     :param video_path: Path to the input video file (.mp4).
     :param output_dir: Path to save the processed frames and results.
+    :param sampling_mode: "fps", "keyframes" or "stride" (see frame_sampler.sample_frames).
+    :param sample_fps: Frames per second analyzed in "fps" mode.
+    :param frame_stride: Analyze every Nth frame in "stride" mode.
+    :param batch_size: Number of frames per YOLO call.
+    :param queue_depth: Maximum number of frames buffered between the decoder, model and writer.
+    :param scene_gating: Skip YOLO on frames that do not change the scene and report scene boundaries.
     :return: A dictionary with timestamps and detected objects/scenes.
     """
+    # OpenCV-based stages are imported on first use to keep worker startup fast
+    from app.services.frame_sampler import sample_frames
+    from app.services.detection_pipeline import run_detection_pipeline
+    from app.services.scene_detection import SceneChangeDetector
+
     try:
-        # Load the YOLOv8 model
-        model = YOLO("yolov8n.pt")
-
-        # Open the video file
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise Exception("Could not open video file!")
-
-        frame_rate = int(cap.get(cv2.CAP_PROP_FPS))  # Get frames per second
-        results = []  # Store detection results
-        frame_count = 0
-
-        # Process the video frame by frame
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break  # End of video
-
-            frame_count += 1
-            timestamp = frame_count / frame_rate
-
-            # Analyze every Nth frame (e.g., every 5th frame to save processing time)
-            if frame_count % 5 == 0:
-                detections = model.predict(frame, conf=0.5)  # Run YOLOv8 detection
-                result = {
-                    "timestamp": round(timestamp, 2),  # Timestamp in seconds
-                    "detections": detections[0].names,  # Detected objects
-                }
-                results.append(result)
-
-                # Optional: Save processed frames with detections as images
-                for detection in detections[0].boxes:
-                    x1, y1, x2, y2 = map(int, detection.xyxy)
-                    label = detection.name
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-                output_frame_path = f"{output_dir}/frame_{frame_count}.jpg"
-                cv2.imwrite(output_frame_path, frame)  # Save frame
-
-        cap.release()
+        # Only run YOLO when the scene changes, reusing detections for near-identical frames
+        scene_detector = SceneChangeDetector() if scene_gating else None
+        # The container duration is more reliable than OpenCV's frame count estimate
+        duration = (probe_video(video_path)["duration"] or None) if sampling_mode == "fps" else None
+
+        # Decode, detect in batches and write annotated frames concurrently
+        with stage_timer("object_detection"):
+            # The resident YOLOv8 predictor keeps per-call state, so videos take turns on it
+            with model_registry.use("yolo") as model:
+                frames = sample_frames(
+                    video_path, mode=sampling_mode, sample_fps=sample_fps, frame_stride=frame_stride, duration=duration
+                )
+                results = run_detection_pipeline(
+                    frames,
+                    model,
+                    output_dir=output_dir if SAVE_ANNOTATED_FRAMES else None,
+                    batch_size=batch_size,
+                    queue_depth=queue_depth,
+                    scene_detector=scene_detector,
+                )
+        scenes = scene_detector.finish() if scene_detector else []
+        reused = sum(1 for result in results if result["reused"])
+        log_message(f"Object detection finished: {len(results)} frames, {reused} reused, {len(scenes)} scenes")
 
         return {
             "status": "success",
             "message": "Video analyzed successfully",
-            "detections": results
+            "detections": results,
+            "scenes": scenes
         }
 
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
-def analyze_segments_with_timestamps(transcript_segments: list) -> list:
+def analyze_segments_with_timestamps(transcript_segments: list, batch_size: int = CLASSIFICATION_BATCH_SIZE) -> list:
     """
     Analyzes transcript segments for harmful content and sentiment.
+    All segment texts are classified in length-sorted batches instead of one forward pass per segment.
     :param transcript_segments: List of segments with text and timestamps.
+    :param batch_size: Number of segments per forward pass.
     :return: List of issues detected with timestamps.
     """
     detected_issues = []
 
-    for segment in transcript_segments:
+    texts = [segment['text'] for segment in transcript_segments]
+    if not texts:
+        return detected_issues
+
+    # Analyze for harmful content and sentiment in batches
+    harmful_content_results = analyze_harmful_content_batch(texts, batch_size)
+    sentiment_results = analyze_sentiment_batch(texts, batch_size)
+
+    for segment, harmful_content_result, sentiment_result in zip(transcript_segments, harmful_content_results, sentiment_results):
         start_time = segment['start']
-        text = segment['text']
 
-        # Analyze for harmful content
-        harmful_content_result = analyze_harmful_content(text)
         if harmful_content_result.get('toxicity_score', 0) > 0.5:  # Threshold for toxicity
             detected_issues.append({
                 "timestamp": format_timestamp(start_time),
                 "problem": "Toxic content detected"
             })
 
-        # Analyze for sentiment
-        sentiment_result = analyze_sentiment(text)
         if sentiment_result.get('label') == "NEGATIVE":
             detected_issues.append({
                 "timestamp": format_timestamp(start_time),
@@ -266,26 +554,3 @@ def generate_summary_with_timestamps(metadata_id: str, video_issues: list, folde
         return summary_file_path
     except Exception as e:
         raise Exception(f"Error generating summary file: {str(e)}")
-
-
-def save_metadata_to_excel(metadata_id, video_info, excel_file_path):
-    """
-    Save metadata information to an Excel file.
-    """
-    try:
-        import pandas as pd
-
-        # Example: Create a DataFrame and write it to Excel
-        data = {
-            "Metadata ID": [metadata_id],
-            "Width": [video_info["width"]],
-            "Height": [video_info["height"]],
-            "Frame Count": [video_info["frame_count"]],
-            "FPS": [video_info["fps"]],
-        }
-        df = pd.DataFrame(data)
-        df.to_excel(excel_file_path, index=False)
-        log_message(f"Metadata saved to Excel: {excel_file_path}")
-    except Exception as e:
-        log_message(f"Error saving metadata to Excel: {str(e)}", "ERROR")
-        raise HTTPException(status_code=500, detail="Failed to save metadata to Excel.")
@@ -0,0 +1,36 @@
+# app/utils/audio_utils.py
+import subprocess
+
+import numpy as np
+
+# Whisper expects 16 kHz mono float32 samples in [-1, 1]
+SAMPLE_RATE = 16000
+
+
+def decode_audio(source_path: str, archive_path: str = None, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode the first audio stream of a media file straight into memory with a single ffmpeg call.
+    :param source_path: Path to the audio or video file.
+    :param archive_path: Optional MP3 path written by the same ffmpeg invocation.
+    :param sample_rate: Output sample rate in Hz.
+    :return: Mono float32 samples.
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+        "-i", source_path,
+        "-map", "0:a:0", "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1",
+    ]
+    if archive_path:
+        command += ["-map", "0:a:0", "-acodec", "mp3", archive_path]
+
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return np.frombuffer(process.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def load_audio_input(audio) -> np.ndarray:
+    """
+    Accept either a path or already decoded samples and return samples for Whisper.
+    """
+    if isinstance(audio, np.ndarray):
+        return audio.astype(np.float32, copy=False)
+    return decode_audio(audio)
@@ -0,0 +1,73 @@
+# app/utils/batching.py
+
+def length_sorted_batches(texts: list, batch_size: int):
+    """
+    Yield batches of (index, text) pairs ordered by text length so that each
+    padded batch wastes as little compute as possible on padding tokens.
+    :param texts: Texts to batch.
+    :param batch_size: Maximum number of texts per batch.
+    """
+    batch_size = max(1, int(batch_size))
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        yield [(i, texts[i]) for i in indices]
+
+
+def run_pipeline_in_batches(text_pipeline, texts: list, batch_size: int) -> list:
+    """
+    Run a Hugging Face text-classification pipeline over many texts in padded,
+    length-sorted batches and return the results in the original order.
+    :param text_pipeline: Callable pipeline accepting a list of texts.
+    :param texts: Texts to classify.
+    :param batch_size: Maximum number of texts per forward pass.
+    :return: One result dict per input text.
+    """
+    results = [None] * len(texts)
+    for batch in length_sorted_batches(texts, batch_size):
+        indices = [i for i, _ in batch]
+        outputs = text_pipeline(
+            [text for _, text in batch],
+            batch_size=len(batch),
+            padding=True,
+            truncation=True,
+        )
+        for i, output in zip(indices, outputs):
+            # Pipelines return a list of labels per input when top_k is set
+            results[i] = output[0] if isinstance(output, list) else output
+    return results
+
+
+def sliding_windows(tokenizer, text: str, window_tokens: int, overlap: int) -> list:
+    """
+    Split a text into overlapping windows that fit the model's input limit.
+    The text is tokenized once and windows are cut on token boundaries, then mapped back to
+    character offsets so each window can be scored (and cached) as plain text.
+    :param tokenizer: Fast tokenizer of the model the windows are scored with.
+    :param text: Text to split.
+    :param window_tokens: Maximum tokens per window, special tokens included.
+    :param overlap: Tokens shared by consecutive windows, smaller than the window.
+    :return: List of (char_start, char_end, new_tokens) tuples, where new_tokens counts the
+             tokens not already covered by the previous window.
+    :raises ValueError: If the overlap leaves no new tokens per window.
+    """
+    limit = min(window_tokens, tokenizer.model_max_length) - tokenizer.num_special_tokens_to_add()
+    limit = max(1, limit)
+    if overlap >= limit:
+        raise ValueError(f"Window overlap ({overlap} tokens) must be smaller than the window ({limit} tokens)")
+
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    offsets = encoding["offset_mapping"]
+    if not offsets:
+        return [(0, len(text), 0)]
+
+    step = limit - max(0, overlap)
+    windows = []
+    previous_end = 0
+    for start in range(0, len(offsets), step):
+        end = min(start + limit, len(offsets))
+        windows.append((offsets[start][0], offsets[end - 1][1], end - max(start, previous_end)))
+        previous_end = end
+        if end == len(offsets):
+            break
+    return windows
@@ -1,23 +1,169 @@
+import atexit
+import contextvars
+import datetime
+import itertools
+import json
 import logging
+import logging.handlers
+import os
+import queue
+from contextlib import contextmanager
 
-# Create logger
-logger = logging.getLogger("video-analysis-logger")
-logger.setLevel(logging.DEBUG)
+from app.config.config import LOG_FILE, LOG_LEVEL, LOG_FORMAT, LOG_ASYNC, LOG_QUEUE_SIZE, LOG_SAMPLING
 
-# Create file handler
-file_handler = logging.FileHandler("app/utils/logs/debug.log")
-file_handler.setLevel(logging.DEBUG)
+# Request and video the current code is working for; copied onto every record
+_log_context = contextvars.ContextVar("log_context", default={})
 
-# Create formatter and add it to the handler
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
 
-# Add the file handler to the logger
-logger.addHandler(file_handler)
+@contextmanager
+def log_context(**fields):
+    """
+    Attach fields such as request_id or metadata_id to every message logged inside the block.
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
 
-# Function to log messages
-def log_message(message: str, level: str = "INFO"):
-    if level == "ERROR":
-        logger.error(message)
+
+class _ContextFilter(logging.Filter):
+    # Runs in the calling thread, so the context is captured before the record is queued
+    def filter(self, record):
+        record.context = _log_context.get()
+        return True
+
+
+class _SamplingFilter(logging.Filter):
+    """
+    Keep one record in every 1 / rate of each sampled category; errors are never dropped.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.intervals = {category: round(1 / rate) if rate > 0 else 0 for category, rate in rates.items() if rate < 1}
+        self._counters = {category: itertools.count() for category in self.intervals}
+
+    def filter(self, record):
+        category = getattr(record, "category", None)
+        interval = self.intervals.get(category)
+        if interval is None or record.levelno >= logging.ERROR:
+            return True
+        return interval > 0 and next(self._counters[category]) % interval == 0
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if getattr(record, "category", None):
+            entry["category"] = record.category
+        entry.update(getattr(record, "context", {}))
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Already rendered by the queue handler
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        message = super().format(record)
+        context = {**getattr(record, "context", {}), **getattr(record, "fields", {})}
+        if context:
+            message += " " + " ".join(f"{key}={value}" for key, value in context.items())
+        return message
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks the caller: records are dropped when the writer falls behind.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The writer thread formats the record; only make it safe to pass between threads
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _build_logger():
+    os.makedirs(os.path.dirname(LOG_FILE) or ".", exist_ok=True)
+
+    file_handler = logging.FileHandler(LOG_FILE)
+    if LOG_FORMAT == "json":
+        file_handler.setFormatter(JSONFormatter())
+    else:
+        file_handler.setFormatter(_TextFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    new_logger = logging.getLogger("video-analysis-logger")
+    new_logger.setLevel(LOG_LEVEL)
+    new_logger.propagate = False
+    new_logger.addFilter(_SamplingFilter(LOG_SAMPLING))
+
+    listener = None
+    if LOG_ASYNC:
+        # Callers only enqueue; a background thread does the formatting and the disk I/O
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        queue_handler = _DroppingQueueHandler(log_queue)
+        queue_handler.addFilter(_ContextFilter())
+        new_logger.addHandler(queue_handler)
+        listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
     else:
-        logger.info(message)
+        file_handler.addFilter(_ContextFilter())
+        new_logger.addHandler(file_handler)
+    return new_logger, listener
+
+
+logger, _listener = _build_logger()
+
+
+def stop_logging():
+    """
+    Flush the queued records and stop the writer thread. Called at shutdown.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+# Function to log messages
+def log_message(message: str, level: str = "INFO", category: str = None, **fields):
+    """
+    Log a message with the current request/video context.
+    :param message: Message text.
+    :param level: DEBUG, INFO, WARNING or ERROR.
+    :param category: Category used for sampling high-volume messages (see LOG_SAMPLING).
+    :param fields: Extra structured fields written with the message.
+    """
+    levelno = logging.getLevelName(level.upper())
+    if not isinstance(levelno, int):
+        levelno = logging.INFO
+    if not logger.isEnabledFor(levelno):
+        return
+    logger.log(levelno, message, extra={"category": category, "fields": fields})
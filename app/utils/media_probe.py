@@ -0,0 +1,91 @@
+# app/utils/media_probe.py
+import json
+import subprocess
+from fractions import Fraction
+
+
+def _to_float(value, default=0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_int(value, default=0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _frame_rate(value: str) -> float:
+    # ffprobe reports rates as fractions such as "30000/1001"
+    try:
+        rate = Fraction(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return 0.0
+    return float(rate) if rate > 0 else 0.0
+
+
+def probe_media(file_path: str) -> dict:
+    """
+    Inspect a media file with a single ffprobe call.
+    :param file_path: Path to the audio or video file.
+    :return: Dictionary with container details, the stream layout and the first video and audio streams.
+    """
+    command = [
+        "ffprobe", "-v", "error",
+        "-print_format", "json",
+        "-show_format", "-show_streams",
+        file_path,
+    ]
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    probe = json.loads(process.stdout or b"{}")
+
+    container = probe.get("format", {})
+    streams = probe.get("streams", [])
+    duration = _to_float(container.get("duration"))
+
+    video = None
+    audio = None
+    for stream in streams:
+        codec_type = stream.get("codec_type")
+        if codec_type == "video" and video is None and not stream.get("disposition", {}).get("attached_pic"):
+            fps = _frame_rate(stream.get("avg_frame_rate")) or _frame_rate(stream.get("r_frame_rate"))
+            stream_duration = _to_float(stream.get("duration"), duration)
+            frame_count = _to_int(stream.get("nb_frames")) or int(round(stream_duration * fps))
+            video = {
+                "index": stream.get("index"),
+                "codec": stream.get("codec_name"),
+                "width": _to_int(stream.get("width")),
+                "height": _to_int(stream.get("height")),
+                "fps": fps,
+                "frame_count": frame_count,
+                "duration": stream_duration,
+                "bit_rate": _to_int(stream.get("bit_rate")),
+                "time_base": stream.get("time_base"),
+            }
+        elif codec_type == "audio" and audio is None:
+            audio = {
+                "index": stream.get("index"),
+                "codec": stream.get("codec_name"),
+                "sample_rate": _to_int(stream.get("sample_rate")),
+                "channels": _to_int(stream.get("channels")),
+                "duration": _to_float(stream.get("duration"), duration),
+                "bit_rate": _to_int(stream.get("bit_rate")),
+            }
+
+    return {
+        "container": container.get("format_name"),
+        "duration": duration,
+        "size": _to_int(container.get("size")),
+        "bit_rate": _to_int(container.get("bit_rate")),
+        "streams": [
+            {"index": stream.get("index"), "codec_type": stream.get("codec_type"), "codec": stream.get("codec_name")}
+            for stream in streams
+        ],
+        "video": video,
+        "audio": audio,
+        "has_video": video is not None,
+        "has_audio": audio is not None,
+    }
@@ -0,0 +1,51 @@
+# app/utils/metrics.py
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+from app.utils.logger import log_message
+
+# Stages run from a fraction of a second (probing) to tens of minutes (transcribing long videos)
+_STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+STAGE_SECONDS = Histogram(
+    "video_pipeline_stage_seconds", "Duration of each pipeline stage", ["stage"], buckets=_STAGE_BUCKETS
+)
+MODEL_LOADS = Counter("model_loads_total", "Models loaded into the registry", ["model"])
+MODEL_LOAD_SECONDS = Histogram("model_load_seconds", "Time to load (and warm up) a model", ["model"], buckets=_STAGE_BUCKETS)
+MODEL_EVICTIONS = Counter("model_evictions_total", "Models evicted to stay within the memory budget", ["model"])
+CACHE_LOOKUPS = Counter(
+    "classification_cache_lookups_total", "Classification cache lookups by outcome", ["result"]
+)
+JOBS_QUEUED = Gauge("video_jobs_queued", "Video analysis jobs waiting for a worker")
+JOBS_IN_FLIGHT = Gauge("video_jobs_in_flight", "Video analysis jobs being processed")
+JOBS_FINISHED = Counter("video_jobs_total", "Finished video analysis jobs", ["status"])
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled")
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"], buckets=_STAGE_BUCKETS
+)
+
+
+@contextmanager
+def stage_timer(stage: str, timings: dict = None):
+    """
+    Time a pipeline stage: the duration is observed in the stage histogram, logged, and
+    recorded in `timings` (seconds by stage name) when given. Failed stages are timed too.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        if timings is not None:
+            timings[stage] = round(elapsed, 3)
+        log_message(f"Stage {stage} took {elapsed:.2f}s", stage=stage, seconds=round(elapsed, 3))
+
+
+def render_metrics():
+    """
+    Return the current metrics in the Prometheus text format, with its content type.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
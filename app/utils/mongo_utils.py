@@ -1,19 +1,85 @@
-from app.config.config import config
-from app.config.config import MONGO_URI
-import boto3
+from app.config.config import get_setting
 import os
 from app.utils.logger import log_message
-from botocore.exceptions import NoCredentialsError
 
-from pymongo import MongoClient
+from pymongo import MongoClient, InsertOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
 import os
+import threading
+from app.config.config import (
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS,
+)
+
+# Pooled clients keyed by connection URI
+_clients = {}
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def _mongo_uri():
+    mongo_uri = os.getenv("MONGO_URI")  # Ensure .env is loaded properly
+    if not mongo_uri:
+        raise ValueError("MONGO_URI is not defined in the environment variables")
+    return mongo_uri
+
+
+def _pool_options():
+    return {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+    }
+
+
+def get_mongo_client(uri: str = None) -> MongoClient:
+    """
+    Return the process-wide pooled MongoClient for a URI, creating it on first use.
+    :param uri: Connection URI, MONGO_URI when not given.
+    """
+    uri = uri or _mongo_uri()
+    client = _clients.get(uri)
+    if client is None:
+        with _client_lock:
+            client = _clients.get(uri)
+            if client is None:
+                client = _clients[uri] = MongoClient(uri, **_pool_options())
+    return client
+
+
+def get_async_mongo_client():
+    """
+    Return the process-wide Motor client for use inside async request handlers.
+    """
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                from motor.motor_asyncio import AsyncIOMotorClient
+                _async_client = AsyncIOMotorClient(_mongo_uri(), **_pool_options())
+    return _async_client
+
+
+def close_mongo_clients():
+    """
+    Close the shared clients, e.g. on application shutdown.
+    """
+    global _async_client
+    with _client_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        if _async_client is not None:
+            _async_client.close()
+            _async_client = None
+
 
 class MongoDB:
     def __init__(self):
-        self.mongo_uri = os.getenv("MONGO_URI")  # Ensure .env is loaded properly
-        if not self.mongo_uri:
-            raise ValueError("MONGO_URI is not defined in the environment variables")
-        self.client = MongoClient(self.mongo_uri)
+        # All instances share one pooled client; creating a MongoDB object is cheap
+        self.client = get_mongo_client()
         self.db = self.client.get_database()  # Set default database
 
     def insert_document(self, collection_name, document):
@@ -24,11 +90,166 @@ class MongoDB:
         except Exception as e:
             raise Exception(f"Error inserting document into {collection_name}: {str(e)}")
 
+    def find_document(self, collection_name, query):
+        try:
+            collection = self.db[collection_name]
+            return collection.find_one(query)
+        except Exception as e:
+            raise Exception(f"Error reading document from {collection_name}: {str(e)}")
+
+    def find_documents(self, collection_name, query, projection=None, sort=None, batch_size=500):
+        """
+        Return a cursor over matching documents; results are fetched lazily in batches.
+        """
+        try:
+            collection = self.db[collection_name]
+            cursor = collection.find(query, projection, batch_size=batch_size)
+            return cursor.sort(sort) if sort else cursor
+        except Exception as e:
+            raise Exception(f"Error reading documents from {collection_name}: {str(e)}")
+
+    def upsert_document(self, collection_name, query, document):
+        try:
+            collection = self.db[collection_name]
+            result = collection.replace_one(query, document, upsert=True)
+            return str(result.upserted_id) if result.upserted_id else None
+        except Exception as e:
+            raise Exception(f"Error upserting document into {collection_name}: {str(e)}")
+
+    def upsert_fields(self, collection_name, query, fields, insert_fields=None):
+        """
+        Set fields on the matching document, creating it when missing. Unlike upsert_document,
+        fields that are not given are kept; insert_fields are only written when the document is created.
+        """
+        try:
+            collection = self.db[collection_name]
+            update = {"$set": fields}
+            if insert_fields:
+                update["$setOnInsert"] = insert_fields
+            result = collection.update_one(query, update, upsert=True)
+            return str(result.upserted_id) if result.upserted_id else None
+        except DuplicateKeyError:
+            # Unique index races are resolved by the caller
+            raise
+        except Exception as e:
+            raise Exception(f"Error upserting document into {collection_name}: {str(e)}")
+
+    def update_document(self, collection_name, query, fields):
+        try:
+            collection = self.db[collection_name]
+            result = collection.update_one(query, {"$set": fields})
+            return result.modified_count
+        except Exception as e:
+            raise Exception(f"Error updating document in {collection_name}: {str(e)}")
+
+    def update_documents(self, collection_name, query, fields):
+        try:
+            collection = self.db[collection_name]
+            result = collection.update_many(query, {"$set": fields})
+            return result.modified_count
+        except Exception as e:
+            raise Exception(f"Error updating documents in {collection_name}: {str(e)}")
+
+    def delete_documents(self, collection_name, query):
+        try:
+            collection = self.db[collection_name]
+            return collection.delete_many(query).deleted_count
+        except Exception as e:
+            raise Exception(f"Error deleting documents from {collection_name}: {str(e)}")
+
+    def bulk_insert(self, collection_name, documents):
+        """
+        Insert many documents (e.g. per-segment or per-frame results) in one round trip.
+        """
+        if not documents:
+            return 0
+        try:
+            collection = self.db[collection_name]
+            result = collection.bulk_write([InsertOne(document) for document in documents], ordered=False)
+            return result.inserted_count
+        except Exception as e:
+            raise Exception(f"Error bulk inserting into {collection_name}: {str(e)}")
+
+    def bulk_update(self, collection_name, updates, upsert=False):
+        """
+        Apply many $set updates in one round trip.
+        :param updates: List of (query, fields) tuples.
+        """
+        if not updates:
+            return 0
+        try:
+            collection = self.db[collection_name]
+            operations = [UpdateOne(query, {"$set": fields}, upsert=upsert) for query, fields in updates]
+            result = collection.bulk_write(operations, ordered=False)
+            return result.modified_count + len(result.upserted_ids)
+        except Exception as e:
+            raise Exception(f"Error bulk updating {collection_name}: {str(e)}")
+
+    def create_index(self, collection_name, keys, **kwargs):
+        try:
+            collection = self.db[collection_name]
+            return collection.create_index(keys, **kwargs)
+        except Exception as e:
+            raise Exception(f"Error creating index on {collection_name}: {str(e)}")
+
+
+class AsyncMongoDB:
+    """
+    Motor-based counterpart of MongoDB for async request handlers, so they do not block on database I/O.
+    """
+
+    def __init__(self):
+        self.client = get_async_mongo_client()
+        self.db = self.client.get_database()  # Set default database
+
+    async def insert_document(self, collection_name, document):
+        try:
+            result = await self.db[collection_name].insert_one(document)
+            return str(result.inserted_id)
+        except Exception as e:
+            raise Exception(f"Error inserting document into {collection_name}: {str(e)}")
+
+    async def find_document(self, collection_name, query):
+        try:
+            return await self.db[collection_name].find_one(query)
+        except Exception as e:
+            raise Exception(f"Error reading document from {collection_name}: {str(e)}")
+
+    async def update_document(self, collection_name, query, fields):
+        try:
+            result = await self.db[collection_name].update_one(query, {"$set": fields})
+            return result.modified_count
+        except Exception as e:
+            raise Exception(f"Error updating document in {collection_name}: {str(e)}")
+
+    async def bulk_insert(self, collection_name, documents):
+        if not documents:
+            return 0
+        try:
+            result = await self.db[collection_name].bulk_write([InsertOne(document) for document in documents], ordered=False)
+            return result.inserted_count
+        except Exception as e:
+            raise Exception(f"Error bulk inserting into {collection_name}: {str(e)}")
+
+    async def bulk_update(self, collection_name, updates, upsert=False):
+        if not updates:
+            return 0
+        try:
+            operations = [UpdateOne(query, {"$set": fields}, upsert=upsert) for query, fields in updates]
+            result = await self.db[collection_name].bulk_write(operations, ordered=False)
+            return result.modified_count + len(result.upserted_ids)
+        except Exception as e:
+            raise Exception(f"Error bulk updating {collection_name}: {str(e)}")
+
 
 def save_file_to_s3(file_path: str, file_extension: str) -> str:
+    # boto3 is only needed here, so it is not imported at startup
+    import boto3
+    from botocore.exceptions import NoCredentialsError
+
     try:
         s3 = boto3.client('s3')
-        bucket_name = config['BUCKET_NAME']  # Access bucket name from config
+        bucket_name = get_setting('BUCKET_NAME')  # Access bucket name from config
 
         # Set the destination file name on S3
         s3_file_name = f"audio/{os.path.basename(file_path)}"
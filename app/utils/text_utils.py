@@ -0,0 +1,20 @@
+# app/utils/text_utils.py
+import hashlib
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for cache lookups: Unicode NFKC, lower case, collapsed whitespace.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip().lower()
+
+
+def text_hash(text: str) -> str:
+    """
+    SHA-256 of the normalized text, so trivially different copies of a segment share one key.
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
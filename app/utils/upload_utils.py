@@ -0,0 +1,54 @@
+# app/utils/upload_utils.py
+import hashlib
+import os
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.config.config import UPLOAD_CHUNK_SIZE, MAX_UPLOAD_SIZE_MB
+from app.utils.logger import log_message
+
+
+async def save_upload_file(upload_file: UploadFile, destination_path: str,
+                           max_bytes: int = MAX_UPLOAD_SIZE_MB * 1024 * 1024,
+                           chunk_size: int = UPLOAD_CHUNK_SIZE) -> dict:
+    """
+    Stream an uploaded file to disk in fixed-size chunks, so memory use does not grow with the file size.
+    The SHA-256 of the content is computed while copying; disk writes run in the threadpool
+    so a slow disk does not stall the event loop.
+    :param upload_file: The FastAPI upload to copy.
+    :param destination_path: Final path of the file on disk.
+    :param max_bytes: Maximum accepted size in bytes (0 disables the limit).
+    :param chunk_size: Number of bytes read per chunk.
+    :return: Dictionary with the file path, size in bytes and SHA-256 hex digest.
+    """
+    os.makedirs(os.path.dirname(destination_path) or ".", exist_ok=True)
+    partial_path = f"{destination_path}.part"
+    sha256 = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(partial_path, "wb") as f:
+            while True:
+                chunk = await upload_file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File exceeds the maximum upload size of {max_bytes // (1024 * 1024)} MB."
+                    )
+                sha256.update(chunk)
+                await run_in_threadpool(f.write, chunk)
+        # Only expose the file under its final name once it is complete
+        os.replace(partial_path, destination_path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    finally:
+        await upload_file.close()
+
+    log_message(f"Upload saved: {destination_path} ({size} bytes)")
+    return {"path": destination_path, "size": size, "sha256": sha256.hexdigest()}
@@ -0,0 +1,107 @@
+# benchmarks/bench_classifiers.py
+"""
+Compare the PyTorch transformers pipelines of the text classifiers with their ONNX Runtime
+exports (plain and int8-quantized) on CPU: single-text latency, batched throughput, and how
+often the labels agree with the PyTorch model.
+
+Usage:
+    python -m benchmarks.bench_classifiers
+    python -m benchmarks.bench_classifiers --texts transcript_segments.txt --batch-size 32
+"""
+import argparse
+import os
+import statistics
+import time
+
+# Benchmark on CPU even when a GPU is present
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+SAMPLE_TEXTS = [
+    "Welcome back to the channel, today we are looking at the new release.",
+    "This is the worst product I have ever used and the support team is useless.",
+    "Thanks for watching, don't forget to like and subscribe.",
+    "You are an idiot and nobody wants to hear what you have to say.",
+    "The weather was lovely and we spent the whole afternoon at the beach.",
+    "I can't believe they charged me twice for the same order.",
+    "Great job everyone, the launch went smoothly.",
+    "Shut up, this is garbage and so are you.",
+]
+
+MODELS = {
+    "sentiment": ("sentiment-analysis", "SENTIMENT_MODEL_ID"),
+    "toxicity": ("text-classification", "TOXICITY_MODEL_ID"),
+}
+
+
+def load_texts(path: str, count: int) -> list:
+    if path:
+        with open(path) as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = SAMPLE_TEXTS
+    # Repeat the corpus up to the requested size
+    return [texts[i % len(texts)] for i in range(max(count, len(texts)))]
+
+
+def load_variant(task: str, model_id: str, variant: str):
+    from app.services import onnx_backend
+    if variant == "transformers":
+        from transformers import pipeline
+        return pipeline(task, model=model_id)
+    return onnx_backend.load_onnx_pipeline(task, model_id, quantize=variant == "onnx-int8")
+
+
+def measure(pipe, texts: list, batch_size: int, latency_samples: int) -> dict:
+    from app.utils.batching import run_pipeline_in_batches
+
+    # Warm up so that session and graph construction are not counted
+    pipe(texts[0])
+    latencies = []
+    for text in texts[:latency_samples]:
+        start = time.perf_counter()
+        pipe(text)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    outputs = run_pipeline_in_batches(pipe, texts, batch_size)
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))] * 1000,
+        "throughput": len(texts) / elapsed if elapsed else 0.0,
+        "outputs": outputs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", help="File with one text per line; built-in samples when omitted")
+    parser.add_argument("--count", type=int, default=256, help="Texts scored in the throughput run")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--latency-samples", type=int, default=50)
+    parser.add_argument("--models", default="sentiment,toxicity")
+    parser.add_argument("--variants", default="transformers,onnx,onnx-int8")
+    args = parser.parse_args()
+
+    from app.services import model_registry
+
+    texts = load_texts(args.texts, args.count)
+    for name in args.models.split(","):
+        task, model_id_name = MODELS[name]
+        model_id = getattr(model_registry, model_id_name)
+        print(f"\n{name} ({model_id}), {len(texts)} texts, batch size {args.batch_size}")
+        print(f"{'variant':<14} {'p50 ms':>8} {'p95 ms':>8} {'texts/s':>9} {'agreement':>10} {'max |Δscore|':>13}")
+
+        reference = None
+        for variant in args.variants.split(","):
+            result = measure(load_variant(task, model_id, variant), texts, args.batch_size, args.latency_samples)
+            if reference is None:
+                reference = result["outputs"]
+            agreement = sum(a["label"] == b["label"] for a, b in zip(reference, result["outputs"])) / len(texts)
+            score_delta = max(abs(a["score"] - b["score"]) for a, b in zip(reference, result["outputs"]))
+            print(f"{variant:<14} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['throughput']:>9.1f} "
+                  f"{agreement:>9.1%} {score_delta:>13.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end benchmark of the video pipeline on synthetic media.
+
+Videos of moving rectangles are written with cv2.VideoWriter at several resolutions and
+lengths, muxed with a speech-like tone track, and every pipeline stage is timed on them:
+audio extraction, metadata probing, transcription, segment classification, object/scene
+detection and the MongoDB writes. Results are written as JSON and can be compared with a
+previous run; the exit status is 1 when a stage got slower than the allowed threshold.
+
+Usage:
+    python -m benchmarks.bench_pipeline --json bench.json
+    python -m benchmarks.bench_pipeline --baseline bench.json --threshold 0.2
+    python -m benchmarks.bench_pipeline --sizes 640x360 --seconds 10 --skip-mongo
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import wave
+
+# Benchmark on CPU even when a GPU is present, and measure real work rather than cache hits
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+os.environ.setdefault("CLASSIFICATION_CACHE_ENABLED", "false")
+
+import numpy as np
+
+from benchmarks.bench_detection import make_synthetic_video
+
+SAMPLE_RATE = 16000
+SEGMENT_PHRASES = [
+    "Welcome back to the channel, today we are looking at the new release.",
+    "This is the worst product I have ever used and the support team is useless.",
+    "Thanks for watching, don't forget to like and subscribe.",
+    "You are an idiot and nobody wants to hear what you have to say.",
+    "The weather was lovely and we spent the whole afternoon at the beach.",
+]
+# Stages shorter than this in both runs are too noisy to flag as regressions
+MIN_COMPARED_SECONDS = 0.05
+
+
+def make_tone_track(path: str, seconds: float) -> str:
+    """
+    Write a 16 kHz WAV of syllable-like tone bursts separated by pauses, so voice activity
+    detection finds "speech" without a TTS engine.
+    """
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 140 + 60 * np.sin(2 * np.pi * 0.3 * t)
+    carrier = np.sin(2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE)
+    # 4 Hz syllable envelope, switched off for one second out of every four
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * ((t % 4) < 3)
+    samples = (0.4 * carrier * envelope * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+    return path
+
+
+def make_synthetic_media(work_dir: str, seconds: float, width: int, height: int) -> str:
+    """
+    Write a synthetic video and mux the tone track into it with ffmpeg.
+    """
+    name = f"synthetic_{width}x{height}_{int(seconds)}s"
+    video_path = make_synthetic_video(os.path.join(work_dir, f"{name}_video.mp4"), seconds, width, height)
+    audio_path = make_tone_track(os.path.join(work_dir, f"{name}.wav"), seconds)
+    output_path = os.path.join(work_dir, f"{name}.mp4")
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-i", video_path, "-i", audio_path,
+         "-c:v", "copy", "-c:a", "aac", "-shortest", output_path],
+        check=True,
+    )
+    return output_path
+
+
+def synthetic_segments(seconds: float) -> list:
+    # One segment every three seconds, like a typical Whisper transcript
+    return [
+        {"start": start, "end": start + 3.0, "text": SEGMENT_PHRASES[i % len(SEGMENT_PHRASES)]}
+        for i, start in enumerate(np.arange(0.0, seconds, 3.0).tolist())
+    ]
+
+
+def run_case(video_path: str, seconds: float, work_dir: str, skip_mongo: bool) -> dict:
+    """
+    Run every stage once on one video.
+    :return: Seconds per stage.
+    """
+    from app.services import video_analysis_service as service
+    from app.services.audio_analysis_service import transcribe_audio_with_timestamps
+    from app.services.harmful_content_service import analyze_harmful_content_batch
+    from app.services.sentiment_analysis_service import analyze_sentiment_batch
+
+    timings = {}
+
+    def stage(name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        timings[name] = time.perf_counter() - start
+        return result
+
+    run_dir = tempfile.mkdtemp(dir=work_dir)
+    stage("extract_audio_from_video", service.extract_audio_from_video, video_path, os.path.join(run_dir, "audio.mp3"))
+    samples = stage("decode_audio_pcm", service.extract_audio_pcm, video_path)
+    media_info = stage("probe_video", service.probe_video, video_path)
+    video_info = stage("process_video", service.process_video, video_path, run_dir, media_info)
+    transcript = stage("transcription", transcribe_audio_with_timestamps, samples)
+    if isinstance(transcript, dict):
+        raise RuntimeError(f"Transcription failed: {transcript.get('error')}")
+    # The tone track has no words, so the classifiers get a fixed synthetic transcript instead
+    segments = synthetic_segments(seconds)
+    issues = stage("analyze_segments_with_timestamps", service.analyze_segments_with_timestamps, segments)
+    # The segment analysis drops per-segment errors, so make sure the classifiers actually ran
+    for classify in (analyze_harmful_content_batch, analyze_sentiment_batch):
+        result = classify([segments[0]["text"]])[0] if segments else {}
+        if "error" in result:
+            raise RuntimeError(f"Segment classification failed: {result['error']}")
+    frames_dir = os.path.join(run_dir, "frames")
+    os.makedirs(frames_dir, exist_ok=True)
+    detection = stage("detect_objects_and_scenes", service.detect_objects_and_scenes, video_path, frames_dir)
+    if detection.get("status") != "success":
+        # Errors are returned rather than raised; a failed stage must not pass as a fast one
+        raise RuntimeError(f"Object detection failed: {detection.get('message')}")
+
+    if not skip_mongo:
+        from app.utils.mongo_utils import MongoDB
+
+        mongo_db = MongoDB()
+        metadata_id = f"bench-{uuid.uuid4()}"
+        documents = [{"metadataId": metadata_id, "index": i, **segment} for i, segment in enumerate(segments)]
+        start = time.perf_counter()
+        mongo_db.insert_document('benchmarkRuns', {"metadataId": metadata_id, "video_info": video_info, "issues": issues})
+        mongo_db.bulk_insert('benchmarkSegments', documents)
+        timings["mongo_insert"] = time.perf_counter() - start
+        mongo_db.delete_documents('benchmarkRuns', {"metadataId": metadata_id})
+        mongo_db.delete_documents('benchmarkSegments', {"metadataId": metadata_id})
+
+    shutil.rmtree(run_dir, ignore_errors=True)
+    return timings
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    List the stages that got slower than the baseline by more than threshold (0.2 = 20 %).
+    """
+    regressions = []
+    for case, stages in results["cases"].items():
+        for name, seconds in stages.items():
+            previous = baseline.get("cases", {}).get(case, {}).get(name)
+            if previous is None or max(previous, seconds) < MIN_COMPARED_SECONDS:
+                continue
+            change = seconds / previous - 1 if previous else float("inf")
+            if change > threshold:
+                regressions.append({"case": case, "stage": name, "baseline": previous, "current": seconds, "change": change})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="640x360,1280x720", help="Comma separated WIDTHxHEIGHT list")
+    parser.add_argument("--seconds", default="10,60", help="Comma separated video lengths")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is reported")
+    parser.add_argument("--skip-mongo", action="store_true", help="Do not time the MongoDB writes")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Earlier results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown per stage (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    from app.services.model_registry import preload_models
+    # Load and warm up the models first so the first case does not pay for it
+    preload_models(background=False)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "repeat": args.repeat,
+        "cases": {},
+    }
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        for size in args.sizes.split(","):
+            width, height = (int(v) for v in size.lower().split("x"))
+            for seconds in (float(s) for s in args.seconds.split(",")):
+                case = f"{width}x{height}_{seconds:g}s"
+                video_path = make_synthetic_media(work_dir, seconds, width, height)
+                runs = [run_case(video_path, seconds, work_dir, args.skip_mongo) for _ in range(args.repeat)]
+                stages = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+                results["cases"][case] = stages
+
+                print(f"\n{case}")
+                for name, elapsed in stages.items():
+                    print(f"  {name:<34} {elapsed:>8.3f}s")
+                print(f"  {'total':<34} {sum(stages.values()):>8.3f}s")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        results["baseline"] = args.baseline
+        results["regressions"] = regressions
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        if regressions:
+            print(f"\nStages slower than the baseline by more than {args.threshold:.0%}:")
+            for r in regressions:
+                print(f"  {r['case']:<20} {r['stage']:<34} {r['baseline']:.3f}s -> {r['current']:.3f}s (+{r['change']:.0%})")
+            sys.exit(1)
+        print(f"\nNo stage regressed by more than {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_startup.py
+"""
+Measure the cold-start cost of the application modules.
+
+Each module is imported in a fresh interpreter, so the numbers include everything the
+import pulls in. The report lists import time, peak RSS, and which heavy dependencies
+got loaded as a side effect (ideally none until a route needs them).
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --json startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODULES = [
+    "app.config.config",
+    "app.utils.logger",
+    "app.utils.mongo_utils",
+    "app.services.model_registry",
+    "app.services.sentiment_analysis_service",
+    "app.services.harmful_content_service",
+    "app.services.audio_analysis_service",
+    "app.services.video_analysis_service",
+    "app.services.job_service",
+    "app.routes.video_analysis_routes",
+    "app.routes.audio_analysis_routes",
+    "app.main",
+]
+
+HEAVY_DEPENDENCIES = ["torch", "transformers", "whisper", "ultralytics", "cv2", "pandas", "boto3", "openai"]
+
+_PROBE = """
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+error = None
+try:
+    importlib.import_module(sys.argv[1])
+except Exception as e:
+    error = repr(e)
+elapsed = time.perf_counter() - start
+heavy = [name for name in sys.argv[2].split(",") if name in sys.modules]
+print(json.dumps({
+    "import_seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": heavy,
+    "error": error,
+}))
+"""
+
+
+def measure(module: str) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.run(
+        [sys.executable, "-c", _PROBE, module, ",".join(HEAVY_DEPENDENCIES)],
+        cwd=root, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    lines = process.stdout.strip().splitlines()
+    if process.returncode != 0 or not lines:
+        return {"module": module, "error": process.stderr.strip().splitlines()[-1:] or ["failed"]}
+    result = json.loads(lines[-1])
+    result["module"] = module
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    results = [measure(module) for module in args.modules]
+    print(f"{'module':<45} {'import s':>9} {'RSS MB':>8}  heavy deps loaded")
+    for result in results:
+        if result.get("error") and "import_seconds" not in result:
+            print(f"{result['module']:<45} failed: {result['error']}")
+            continue
+        heavy = ", ".join(result["heavy_modules"]) or "-"
+        print(f"{result['module']:<45} {result['import_seconds']:>9.3f} {result['max_rss_mb']:>8.1f}  {heavy}")
+        if result.get("error"):
+            print(f"{'':<45} error: {result['error']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import re
+
+import pytest
+
+from app.utils.batching import sliding_windows
+
+
+class WhitespaceTokenizer:
+    """
+    One token per word, with the fast-tokenizer attributes sliding_windows relies on.
+    """
+    model_max_length = 512
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False, verbose=False):
+        return {"offset_mapping": [match.span() for match in re.finditer(r"\S+", text)]}
+
+
+def test_windows_overlap_and_cover_the_text():
+    text = " ".join(f"w{i}" for i in range(100))
+    windows = sliding_windows(WhitespaceTokenizer(), text, window_tokens=22, overlap=5)
+    assert windows[0][0] == 0
+    assert windows[-1][1] == len(text)
+    assert sum(new_tokens for _, _, new_tokens in windows) == 100
+    assert all(len(text[start:end].split()) <= 20 for start, end, _ in windows)
+
+
+@pytest.mark.parametrize("overlap", [20, 50])
+def test_overlap_must_be_smaller_than_the_window(overlap):
+    with pytest.raises(ValueError):
+        sliding_windows(WhitespaceTokenizer(), "a b c", window_tokens=22, overlap=overlap)
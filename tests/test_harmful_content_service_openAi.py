@@ -0,0 +1,100 @@
+import json
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from app.services import harmful_content_service_openAi as service
+
+
+class MockChatCompletion:
+    """
+    Stand-in for openai.ChatCompletion: scores every packed segment and records the requests
+    and the peak number of requests in flight.
+    """
+
+    def __init__(self, delay: float = 0.0, drop_ids=()):
+        self.delay = delay
+        self.drop_ids = set(drop_ids)
+        self.requests = []
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def create(self, model, messages, temperature):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self.requests.append(messages[1]["content"])
+        try:
+            time.sleep(self.delay)
+            if messages[0]["content"] == service.BATCH_SYSTEM_PROMPT:
+                segments = json.loads(messages[1]["content"])["segments"]
+                reply = {s["id"]: self._scores(s["text"]) for s in segments if s["id"] not in self.drop_ids}
+            else:
+                reply = self._scores(messages[1]["content"])
+            return {"choices": [{"message": {"content": json.dumps(reply)}}]}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    @staticmethod
+    def _scores(text: str) -> dict:
+        value = 0.9 if "idiot" in text.lower() else 0.1
+        return {"toxicity": value, "profanity": 0.0, "hate_speech": 0.0, "insults": value}
+
+
+@pytest.fixture
+def api(monkeypatch):
+    chat = MockChatCompletion()
+    monkeypatch.setitem(sys.modules, "openai", types.SimpleNamespace(ChatCompletion=chat, api_key=None))
+    monkeypatch.setattr(service, "get_setting", lambda name: "test-key")
+    service._cache.clear()
+    yield chat
+    service._cache.clear()
+
+
+def test_segments_are_packed_and_mapped_back(api):
+    segments = {f"seg-{i}": f"segment {i}" for i in range(45)}
+    segments["seg-rude"] = "You idiot"
+    results = service.analyze_segments(segments, batch_size=20)
+    assert len(api.requests) == 3
+    assert results["seg-rude"]["toxicity"] == 0.9
+    assert all(results[f"seg-{i}"]["toxicity"] == 0.1 for i in range(45))
+
+
+def test_duplicates_and_cached_texts_are_sent_once(api):
+    service.analyze_segments({"a": "Hello  world", "b": "hello world"})
+    assert len(api.requests) == 1
+    assert len(json.loads(api.requests[0])["segments"]) == 1
+    results = service.analyze_harmful_content_batch(["HELLO WORLD", "new text"])
+    assert len(api.requests) == 2
+    assert [s["text"] for s in json.loads(api.requests[1])["segments"]] == ["new text"]
+    assert results[0]["toxicity"] == 0.1
+
+
+def test_missing_segments_are_errors_and_not_cached(api):
+    api.drop_ids = {"1"}
+    results = service.analyze_harmful_content_batch(["first", "second"])
+    assert "error" in results[1]
+    api.drop_ids = set()
+    assert "error" not in service.analyze_harmful_content_batch(["second"])[0]
+    assert len(api.requests) == 2
+
+
+def test_concurrency_is_bounded_across_callers(api, monkeypatch):
+    api.delay = 0.05
+    monkeypatch.setattr(service, "_request_slots", threading.BoundedSemaphore(2))
+    jobs = [
+        threading.Thread(target=service.analyze_segments, args=({str(i): f"job {job} segment {i}" for i in range(12)}, 2))
+        for job in range(3)
+    ]
+    jobs.append(threading.Thread(target=service.analyze_harmful_content, args=("single request",)))
+    for job in jobs:
+        job.start()
+    for job in jobs:
+        job.join()
+    assert len(api.requests) == 3 * 6 + 1
+    assert api.peak <= 2
@@ -0,0 +1,149 @@
+import asyncio
+import functools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from app.services import harmful_content_service_perspective as perspective
+from app.services.harmful_content_service_perspective import PerspectiveClient, ATTRIBUTES
+
+
+def _scores(value: float) -> dict:
+    return {"attributeScores": {attribute: {"summaryScore": {"value": value}} for attribute in ATTRIBUTES.values()}}
+
+
+class StandInServer:
+    """
+    Local stand-in for the Perspective API. Answers with queued (status, headers) responses
+    first and a successful score afterwards, recording every request.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server._lock:
+                    server.requests.append((time.monotonic(), body["comment"]["text"]))
+                    server.connections.add(self.client_address)
+                    status, headers = server.responses.pop(0) if server.responses else (200, {})
+                payload = json.dumps(_scores(0.9 if "idiot" in body["comment"]["text"] else 0.1)).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}/analyze"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def shared_client(server, monkeypatch):
+    # The module-level functions create their client with the configured defaults
+    monkeypatch.setattr(perspective, "PerspectiveClient", functools.partial(
+        PerspectiveClient, api_key="test", url=server.url, qps=0, max_concurrency=4, backoff_seconds=0.01
+    ))
+    perspective.close_perspective_client()
+    yield
+    perspective.close_perspective_client()
+
+
+def _run(server, coroutine_fn, **options):
+    options.setdefault("qps", 0)
+
+    async def run():
+        async with PerspectiveClient(api_key="test", url=server.url, **options) as client:
+            return await coroutine_fn(client)
+    return asyncio.run(run())
+
+
+def test_scores_are_parsed(server):
+    result = _run(server, lambda client: client.analyze("you idiot"))
+    assert result == {name: 0.9 for name in ATTRIBUTES}
+
+
+def test_retries_after_429_honouring_retry_after(server):
+    server.responses = [(429, {"Retry-After": "0.2"}), (503, {})]
+    start = time.monotonic()
+    result = _run(server, lambda client: client.analyze("hello"), backoff_seconds=0.01)
+    assert result["toxicity"] == 0.1
+    assert len(server.requests) == 3
+    assert time.monotonic() - start >= 0.2
+
+
+def test_gives_up_after_max_retries(server):
+    server.responses = [(503, {})] * 3
+    result = _run(server, lambda client: client.analyze("hello"), max_retries=2, backoff_seconds=0.01)
+    assert "error" in result
+    assert len(server.requests) == 3
+
+
+def test_client_errors_are_not_retried(server):
+    server.responses = [(400, {})]
+    result = _run(server, lambda client: client.analyze("hello"))
+    assert "error" in result
+    assert len(server.requests) == 1
+
+
+def test_rate_limit_spaces_requests(server):
+    results = _run(server, lambda client: client.analyze_many(["a"] * 6), qps=20, max_concurrency=6)
+    assert len(results) == 6
+    starts = sorted(t for t, _ in server.requests)
+    assert starts[-1] - starts[0] >= 5 / 20 * 0.9
+
+
+def test_sync_calls_share_one_client(server, shared_client):
+    texts = ["you idiot", "hello", "nice"]
+    assert [r["toxicity"] for r in perspective.analyze_harmful_content_batch(texts)] == [0.9, 0.1, 0.1]
+    client = perspective.get_perspective_client()
+    for text in texts * 3:
+        perspective.analyze_harmful_content(text)
+    assert perspective.get_perspective_client() is client
+    # Keep-alive connections are reused instead of one per call
+    assert len(server.connections) <= 4
+
+
+def test_sync_call_inside_running_event_loop(server, shared_client):
+    async def handler():
+        return perspective.analyze_harmful_content("hello")
+
+    assert asyncio.run(handler())["toxicity"] == 0.1
+
+
+def test_async_callers_share_the_client_across_loops(server, shared_client):
+    first = asyncio.run(perspective.analyze_harmful_content_async("you idiot"))
+    client = perspective.get_perspective_client()
+    second = asyncio.run(perspective.analyze_harmful_content_batch_async(["hello"]))
+    assert first["toxicity"] == 0.9
+    assert second[0]["toxicity"] == 0.1
+    assert perspective.get_perspective_client() is client
@@ -0,0 +1,133 @@
+import asyncio
+import inspect
+import threading
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from app.utils import mongo_utils
+from app.utils.mongo_utils import MongoDB, AsyncMongoDB
+
+
+@pytest.fixture(autouse=True)
+def mock_client(monkeypatch):
+    monkeypatch.setenv("MONGO_URI", "mongodb://localhost/testdb")
+    monkeypatch.setattr(mongo_utils, "MongoClient", mongomock.MongoClient)
+    mongo_utils.close_mongo_clients()
+    yield
+    mongo_utils.close_mongo_clients()
+
+
+@pytest.fixture
+def bulk_update_support(monkeypatch):
+    # pymongo 4.9 and later pass a sort option with every UpdateOne that mongomock does not know yet
+    builder = mongomock.collection.BulkOperationBuilder
+    add_update = builder.add_update
+    if "sort" not in inspect.signature(add_update).parameters:
+        def add_update_without_sort(self, *args, sort=None, **kwargs):
+            return add_update(self, *args, **kwargs)
+        monkeypatch.setattr(builder, "add_update", add_update_without_sort)
+
+
+@pytest.fixture
+def mock_async_client(monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    motor_asyncio = pytest.importorskip("motor.motor_asyncio")
+    monkeypatch.setattr(motor_asyncio, "AsyncIOMotorClient", mongomock_motor.AsyncMongoMockClient)
+
+
+def test_instances_share_one_client():
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(MongoDB().client)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(client) for client in clients}) == 1
+    assert MongoDB().client is mongo_utils.get_mongo_client()
+
+
+def test_close_drops_the_shared_client():
+    client = MongoDB().client
+    mongo_utils.close_mongo_clients()
+    assert MongoDB().client is not client
+
+
+def test_clients_are_pooled_per_uri():
+    other = mongo_utils.get_mongo_client("mongodb://localhost/configdb")
+    assert mongo_utils.get_mongo_client("mongodb://localhost/configdb") is other
+    assert other is not mongo_utils.get_mongo_client()
+
+
+def test_bulk_insert():
+    mongo_db = MongoDB()
+    documents = [{"metadataId": "1", "index": i} for i in range(5)]
+    assert mongo_db.bulk_insert("segments", documents) == 5
+    assert mongo_db.bulk_insert("segments", []) == 0
+    assert [d["index"] for d in mongo_db.find_documents("segments", {"metadataId": "1"}, sort=[("index", 1)])] == list(range(5))
+
+
+def test_bulk_update_with_upsert(bulk_update_support):
+    mongo_db = MongoDB()
+    mongo_db.bulk_insert("segments", [{"index": 0, "text": "a"}])
+    changed = mongo_db.bulk_update("segments", [({"index": 0}, {"text": "b"}), ({"index": 1}, {"text": "c"})], upsert=True)
+    assert changed == 2
+    assert mongo_db.find_document("segments", {"index": 0})["text"] == "b"
+    assert mongo_db.find_document("segments", {"index": 1})["text"] == "c"
+
+
+def test_upsert_document_replaces():
+    mongo_db = MongoDB()
+    assert mongo_db.upsert_document("videos", {"metadataId": "1"}, {"metadataId": "1", "status": "pending", "stage": "x"})
+    assert mongo_db.upsert_document("videos", {"metadataId": "1"}, {"metadataId": "1", "status": "processed"}) is None
+    document = mongo_db.find_document("videos", {"metadataId": "1"})
+    assert document["status"] == "processed"
+    assert "stage" not in document
+
+
+def test_upsert_fields_keeps_other_fields():
+    mongo_db = MongoDB()
+    mongo_db.upsert_fields("videos", {"metadataId": "1"}, {"video_info": {"fps": 25}}, insert_fields={"status": "pending"})
+    mongo_db.update_document("videos", {"metadataId": "1"}, {"status": "processing", "stage": "transcribing"})
+    mongo_db.upsert_fields("videos", {"metadataId": "1"}, {"video_info": {"fps": 30}}, insert_fields={"status": "pending"})
+    document = mongo_db.find_document("videos", {"metadataId": "1"})
+    assert document["video_info"] == {"fps": 30}
+    assert document["status"] == "processing"
+    assert document["stage"] == "transcribing"
+
+
+def test_async_client_is_shared(mock_async_client):
+    assert AsyncMongoDB().client is AsyncMongoDB().client
+
+
+def test_async_bulk_insert(mock_async_client):
+    async def run():
+        mongo_db = AsyncMongoDB()
+        inserted = await mongo_db.bulk_insert("segments", [{"index": i} for i in range(3)])
+        return inserted, await mongo_db.bulk_insert("segments", []), await mongo_db.find_document("segments", {"index": 2})
+
+    inserted, empty, document = asyncio.run(run())
+    assert inserted == 3
+    assert empty == 0
+    assert document is not None
+
+
+def test_async_bulk_update(mock_async_client, bulk_update_support):
+    async def run():
+        mongo_db = AsyncMongoDB()
+        await mongo_db.bulk_insert("segments", [{"index": i, "text": ""} for i in range(3)])
+        updated = await mongo_db.bulk_update("segments", [({"index": 2}, {"text": "x"}), ({"index": 3}, {"text": "y"})], upsert=True)
+        return updated, await mongo_db.find_document("segments", {"index": 2})
+
+    updated, document = asyncio.run(run())
+    assert updated == 2
+    assert document["text"] == "x"
+
+
+def test_upsert_fields_raises_duplicate_key_errors():
+    mongo_db = MongoDB()
+    mongo_db.create_index("videos", [("contentHash", 1)], unique=True)
+    mongo_db.upsert_fields("videos", {"metadataId": "1"}, {"contentHash": "abc"})
+    with pytest.raises(mongo_utils.DuplicateKeyError):
+        mongo_db.upsert_fields("videos", {"metadataId": "2"}, {"contentHash": "abc"})
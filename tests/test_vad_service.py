@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from app.services.vad_service import detect_speech_regions, speech_coverage
+
+SAMPLE_RATE = 16000
+
+
+def _voiced(seconds: float, modulation: float) -> np.ndarray:
+    # Gliding tone with a 4 Hz syllable envelope that never drops to silence
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 140 + 60 * np.sin(2 * np.pi * 0.3 * t)
+    carrier = np.sin(2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE)
+    envelope = 1 - modulation * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t))
+    return (0.3 * carrier * envelope).astype(np.float32)
+
+
+@pytest.mark.parametrize("modulation", [0.3, 0.6])
+def test_continuous_speech_is_kept(modulation):
+    samples = _voiced(60, modulation)
+    regions = detect_speech_regions(samples, SAMPLE_RATE, backend="energy")
+    stats = speech_coverage(regions, len(samples), SAMPLE_RATE)
+    assert stats["speech_seconds"] >= 59
+
+
+def test_pauses_are_removed():
+    samples = _voiced(12, 0.3)
+    t = np.arange(len(samples)) / SAMPLE_RATE
+    # Two seconds of speech, then two seconds of silence
+    samples[(t % 4) >= 2] = 0
+    regions = detect_speech_regions(samples, SAMPLE_RATE, backend="energy")
+    stats = speech_coverage(regions, len(samples), SAMPLE_RATE)
+    assert stats["speech_regions"] == 3
+    assert 6 <= stats["speech_seconds"] < 8
+
+
+def test_silence_has_no_speech():
+    rng = np.random.default_rng(0)
+    samples = (1e-4 * rng.standard_normal(10 * SAMPLE_RATE)).astype(np.float32)
+    assert detect_speech_regions(samples, SAMPLE_RATE, backend="energy") == []
+
+
+def _chords(seconds: float) -> np.ndarray:
+    # Held three-note chords of equal loudness, changing every 0.75 s
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    roots = np.array([220, 196, 247, 262])[(t // 0.75).astype(int) % 4]
+    phase = np.cumsum(roots) / SAMPLE_RATE
+    return (0.15 * sum(np.sin(2 * np.pi * ratio * phase) for ratio in (1, 1.26, 1.5))).astype(np.float32)
+
+
+@pytest.mark.parametrize("signal", ["tone", "chords"])
+def test_music_without_pauses_is_dropped(signal):
+    t = np.arange(20 * SAMPLE_RATE) / SAMPLE_RATE
+    samples = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32) if signal == "tone" else _chords(20)
+    assert detect_speech_regions(samples, SAMPLE_RATE, backend="energy") == []